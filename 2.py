@@ -1,18 +1,56 @@
 import cv2
+import functools
+import logging
 import os
-import glob
+import re
+from concurrent.futures import ThreadPoolExecutor
 from datetime import datetime
 
+log = logging.getLogger(__name__)
+
+# 対応する画像ファイル名（拡張子は大文字小文字を区別しない）
+IMAGE_FILE_PATTERN = re.compile(r'.*\.(jpe?g|png|bmp|tiff?)$', re.IGNORECASE)
+
 def get_image_files():
     """sample_imgフォルダから画像ファイルを取得"""
-    image_extensions = ['*.jpg', '*.jpeg', '*.png', '*.bmp', '*.tiff', '*.tif']
-    image_files = []
+    # ディレクトリを1回だけ走査し、事前コンパイルした正規表現で判定
+    try:
+        with os.scandir('sample_img') as entries:
+            image_files = [entry.path for entry in entries
+                           if IMAGE_FILE_PATTERN.match(entry.name) and entry.is_file()]
+    except FileNotFoundError:
+        return []
     
-    for ext in image_extensions:
-        image_files.extend(glob.glob(os.path.join('sample_img', ext)))
-        image_files.extend(glob.glob(os.path.join('sample_img', ext.upper())))
+    return sorted(image_files, key=str.lower)
+
+# select_image_file で先読みした画像 {パス: Future}
+prefetched_images = {}
+# 先読みする画像の最大数（sample_imgはキャプチャのたびに増えるため、一覧の先頭の数枚だけに限る）
+PREFETCH_MAX_IMAGES = 4
+
+def prefetch_images(image_files):
+    """一覧の先頭の候補画像のデコードをバックグラウンドで開始（cv2.imreadはGILを解放する）"""
+    image_files = image_files[:PREFETCH_MAX_IMAGES]
+    executor = ThreadPoolExecutor(max_workers=len(image_files))
+    for image_file in image_files:
+        prefetched_images[image_file] = executor.submit(cv2.imread, image_file)
+    executor.shutdown(wait=False)
+
+def discard_prefetched_images(keep=None):
+    """選択されなかった画像の先読みを破棄
     
-    return sorted(image_files)
+    開始前のものは取り消し、実行中のものも参照を外すので、デコード結果は完了後すぐに解放される
+    """
+    for image_file in list(prefetched_images):
+        if image_file != keep:
+            prefetched_images.pop(image_file).cancel()
+
+def read_image(image_path):
+    """画像を読み込む（先読み済みならその結果を1度だけ使う）"""
+    future = prefetched_images.pop(image_path, None)
+    if future is not None:
+        return future.result()
+    return cv2.imread(image_path)
 
 def select_image_file():
     """画像ファイルを選択する"""
@@ -27,6 +65,9 @@ def select_image_file():
         print(f"画像ファイルを読み込みます: {image_files[0]}")
         return image_files[0]
     
+    # 番号の入力を待つ間にデコードを済ませておく
+    prefetch_images(image_files)
+    
     print("複数の画像ファイルが見つかりました:")
     for i, file in enumerate(image_files):
         print(f"{i + 1}: {os.path.basename(file)}")
@@ -37,54 +78,50 @@ def select_image_file():
             index = int(choice) - 1
             if 0 <= index < len(image_files):
                 print(f"選択された画像: {image_files[index]}")
+                discard_prefetched_images(keep=image_files[index])
                 return image_files[index]
             else:
                 print("無効な番号です。再入力してください。")
         except (ValueError, KeyboardInterrupt):
             print("無効な入力です。再入力してください。")
 
+# 各色の座標範囲 (x1, y1, x2, y2)
+COLOR_COORDINATES = {
+    'orange': (297, 86, 347, 133),
+    'green': (303, 110, 350, 164),  # greenの座標範囲
+    'red': (299, 168, 348, 213)     # redの座標範囲
+}
+
 def get_color_coordinates():
-    """各色の座標範囲を定義"""
-    color_coordinates = {
-        'orange': (297, 86, 347, 133),  # (x1, y1, x2, y2)
-        'green': (303, 110, 350, 164),  # greenの座標範囲
-        'red': (299, 168, 348, 213)     # redの座標範囲
-    }
-    return color_coordinates
-
-def crop_image_by_color(image_path, color_name, coordinates):
-    """指定された色の座標で画像を切り出す"""
-    # 画像を読み込み
-    image = cv2.imread(image_path)
-    if image is None:
-        print(f"エラー: 画像ファイルを読み込めませんでした: {image_path}")
-        return None
-    
+    """各色の座標範囲を取得"""
+    return COLOR_COORDINATES
+
+@functools.lru_cache(maxsize=32)
+def clamp_coordinates(coordinates, width, height):
+    """座標を画像サイズ内に収める（座標と画像サイズが同じなら結果を再利用）"""
     x1, y1, x2, y2 = coordinates
-    
+    return (max(0, min(x1, width)), max(0, min(y1, height)),
+            max(0, min(x2, width)), max(0, min(y2, height)))
+
+def crop_image_by_color(image, color_name, coordinates):
+    """読み込み済みの画像を指定された色の座標で切り出す"""
     # 座標の妥当性をチェック
     height, width = image.shape[:2]
-    x1 = max(0, min(x1, width))
-    y1 = max(0, min(y1, height))
-    x2 = max(0, min(x2, width))
-    y2 = max(0, min(y2, height))
+    x1, y1, x2, y2 = clamp_coordinates(tuple(coordinates), width, height)
     
     if x1 >= x2 or y1 >= y2:
         print(f"エラー: {color_name}の座標範囲が無効です")
         return None
     
-    # 画像を切り出し
+    # 画像を切り出し（スライスはコピーを作らないビュー）
     cropped_image = image[y1:y2, x1:x2]
-    print(f"{color_name}の切り出し範囲: ({x1}, {y1}) から ({x2}, {y2})")
-    print(f"{color_name}の切り出し後サイズ: {cropped_image.shape[1]} x {cropped_image.shape[0]}")
+    log.debug("%sの切り出し範囲: (%d, %d) から (%d, %d)", color_name, x1, y1, x2, y2)
+    log.debug("%sの切り出し後サイズ: %d x %d", color_name, cropped_image.shape[1], cropped_image.shape[0])
     
     return cropped_image
 
-def save_cropped_image_by_color(cropped_image, color_name, original_path):
-    """色名付きで切り出した画像を保存"""
-    if cropped_image is None:
-        return None
-    
+def cropped_image_path(color_name, original_path):
+    """切り出し画像の保存先パスを返す"""
     # 元のファイル名から拡張子を取得
     extension = os.path.splitext(original_path)[1]
     
@@ -93,7 +130,14 @@ def save_cropped_image_by_color(cropped_image, color_name, original_path):
         extension = '.png'
     
     output_filename = f"{color_name}{extension}"
-    output_path = os.path.join("sample_img", output_filename)
+    return os.path.join("sample_img", output_filename)
+
+def save_cropped_image_by_color(cropped_image, color_name, original_path):
+    """色名付きで切り出した画像を保存"""
+    if cropped_image is None:
+        return None
+    
+    output_path = cropped_image_path(color_name, original_path)
     
     # 画像を保存（既存ファイルがあれば上書き）
     success = cv2.imwrite(output_path, cropped_image)
@@ -105,46 +149,61 @@ def save_cropped_image_by_color(cropped_image, color_name, original_path):
         print(f"エラー: {color_name}の画像保存に失敗しました")
         return None
 
-def process_all_colors(image_path):
-    """すべての色座標で画像を切り出して保存"""
-    print(f"元画像サイズを確認中...")
-    original_image = cv2.imread(image_path)
-    if original_image is None:
-        print("画像の読み込みに失敗しました")
-        return []
-    
-    print(f"元画像サイズ: {original_image.shape[1]} x {original_image.shape[0]}")
-    
-    color_coordinates = get_color_coordinates()
-    saved_files = []
-    
-    print(f"\n3つの色座標で切り出し処理を開始します...")
-    print("=" * 50)
+def crop_all_colors(original_image):
+    """すべての色座標で切り出し、{色名: 切り出し画像} を返す（ディスクを経由しない）"""
+    crops = {}
     
-    for color_name, coordinates in color_coordinates.items():
+    for color_name, coordinates in get_color_coordinates().items():
         print(f"\n{color_name.upper()}の処理中...")
         print("-" * 30)
         
-        # 画像を切り出し
-        cropped_image = crop_image_by_color(image_path, color_name, coordinates)
+        # 読み込み済みの画像から切り出し（色ごとの再デコードを避ける）
+        cropped_image = crop_image_by_color(original_image, color_name, coordinates)
         
         if cropped_image is not None:
-            # 色名付きで保存
-            output_path = save_cropped_image_by_color(cropped_image, color_name, image_path)
-            if output_path:
-                saved_files.append((color_name, output_path))
+            crops[color_name] = cropped_image
         else:
             print(f"{color_name}の切り出しに失敗しました")
     
-    return saved_files
+    return crops
 
-def display_preview_all_colors(image_path, saved_files):
-    """すべての色の切り出し結果をプレビュー表示"""
-    original_image = cv2.imread(image_path)
-    if original_image is None:
-        return
+# 切り出し画像の書き出し用（cv2.imwriteはGILを解放するため、表示・分析と並行して書き出せる）
+save_executor = ThreadPoolExecutor(max_workers=3)
+# 書き出し中のファイル {色名: Future}
+pending_saves = {}
+
+def process_all_colors(image_path, original_image):
+    """読み込み済みの画像をすべての色座標で切り出し、保存をバックグラウンドで開始
+    
+    戻り値は (色名, 保存先パス, 切り出し画像) のリスト。保存の完了は待たないので、
+    後続の表示はメモリ上の切り出し画像を使い、最後に wait_for_saves() で確認する
+    """
+    print(f"元画像サイズ: {original_image.shape[1]} x {original_image.shape[0]}")
     
-    # 元画像に全ての矩形を描画
+    print(f"\n3つの色座標で切り出し処理を開始します...")
+    print("=" * 50)
+    
+    crops = crop_all_colors(original_image)
+    
+    cropped_files = []
+    for color_name, cropped_image in crops.items():
+        pending_saves[color_name] = save_executor.submit(
+            save_cropped_image_by_color, cropped_image, color_name, image_path)
+        cropped_files.append((color_name, cropped_image_path(color_name, image_path), cropped_image))
+    
+    return cropped_files
+
+def wait_for_saves():
+    """バックグラウンドの保存が終わるのを待ち、保存できたファイル数を返す"""
+    saved_count = 0
+    for color_name in list(pending_saves):
+        if pending_saves.pop(color_name).result():
+            saved_count += 1
+    return saved_count
+
+def display_preview_all_colors(original_image, cropped_files):
+    """すべての色の切り出し結果をプレビュー表示（読み込み済みの元画像を使う）"""
+    # 切り出し画像は元画像のビューで、保存中の場合もあるため、矩形はコピーに描画する
     display_original = original_image.copy()
     color_coordinates = get_color_coordinates()
     
@@ -166,13 +225,11 @@ def display_preview_all_colors(image_path, saved_files):
     cv2.namedWindow('Original Image with All Crop Areas', cv2.WINDOW_NORMAL)
     cv2.imshow('Original Image with All Crop Areas', display_original)
     
-    # 各色の切り出し画像を表示
-    for color_name, file_path in saved_files:
-        cropped_image = cv2.imread(file_path)
-        if cropped_image is not None:
-            window_name = f'{color_name.upper()} Cropped'
-            cv2.namedWindow(window_name, cv2.WINDOW_NORMAL)
-            cv2.imshow(window_name, cropped_image)
+    # 各色の切り出し画像を表示（メモリ上の切り出し結果をそのまま使用）
+    for color_name, file_path, cropped_image in cropped_files:
+        window_name = f'{color_name.upper()} Cropped'
+        cv2.namedWindow(window_name, cv2.WINDOW_NORMAL)
+        cv2.imshow(window_name, cropped_image)
     
     print("何かキーを押すと終了します...")
     cv2.waitKey(0)
@@ -199,24 +256,34 @@ def main():
         print("画像ファイルが見つからないため終了します")
         return
     
-    # すべての色座標で処理
-    saved_files = process_all_colors(image_path)
+    # 画像を1回だけ読み込み、切り出しとプレビューで共有する
+    print(f"元画像サイズを確認中...")
+    original_image = read_image(image_path)
+    if original_image is None:
+        print("画像の読み込みに失敗しました")
+        return
+    
+    # すべての色座標で処理（保存はバックグラウンドで進める）
+    cropped_files = process_all_colors(image_path, original_image)
     
-    if saved_files:
+    if cropped_files:
         print("\n" + "=" * 50)
-        print("処理が完了しました！")
-        print(f"保存されたファイル数: {len(saved_files)}")
+        print("切り出しが完了しました！")
+        print(f"切り出した画像数: {len(cropped_files)}")
         print("-" * 30)
         
-        for color_name, file_path in saved_files:
+        for color_name, file_path, _ in cropped_files:
             print(f"  {color_name}: {os.path.basename(file_path)}")
         
         # プレビュー表示の選択
         show_preview = input("\n切り出し結果をプレビューしますか？ (y/n): ").lower().strip()
         if show_preview == 'y' or show_preview == 'yes':
-            display_preview_all_colors(image_path, saved_files)
+            display_preview_all_colors(original_image, cropped_files)
+        
+        print(f"保存されたファイル数: {wait_for_saves()}")
     else:
         print("すべての画像の切り出しに失敗しました")
 
 if __name__ == "__main__":
+    logging.basicConfig(level=logging.WARNING, format='%(message)s')
     main()
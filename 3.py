@@ -1,7 +1,82 @@
 import cv2
+import logging
 import numpy as np
 import os
 
+try:
+    from numba import njit
+except ImportError:
+    njit = None
+
+log = logging.getLogger(__name__)
+
+# 色分類用のルックアップテーブル (HSV)
+# 色相 0-179 を色クラスに対応付ける (0: 該当なし, cv2.LUT用に256要素)
+COLOR_CLASSES = {'赤': 1, 'オレンジ': 2, '緑': 3}
+HUE_CLASS = np.zeros(256, dtype=np.uint8)
+HUE_CLASS[0:11] = COLOR_CLASSES['赤']        # 赤色下限 (0-10)
+HUE_CLASS[170:180] = COLOR_CLASSES['赤']     # 赤色上限 (170-180)
+HUE_CLASS[11:26] = COLOR_CLASSES['オレンジ']  # オレンジ色 (11-25)
+HUE_CLASS[40:81] = COLOR_CLASSES['緑']       # 緑色 (40-80)
+SATURATION_MIN = 50  # 彩度の下限
+VALUE_MIN = 50       # 明度の下限
+HSV_VALID_LOWER = np.array([0, SATURATION_MIN, VALUE_MIN], dtype=np.uint8)
+HSV_VALID_UPPER = np.array([179, 255, 255], dtype=np.uint8)
+# この画素数以上の画像はOpenCL (T-API) で処理する（小さな切り出し画像では転送コストが上回る）
+OPENCL_MIN_PIXELS = 640 * 480
+
+# OpenCVの8bit HSV変換と同じ固定小数点テーブル
+HSV_SHIFT = 12
+HSV_ROUND = 1 << (HSV_SHIFT - 1)
+SAT_DIV = np.zeros(256, dtype=np.int32)
+SAT_DIV[1:] = np.rint((255 << HSV_SHIFT) / np.arange(1, 256)).astype(np.int32)
+HUE_DIV = np.zeros(256, dtype=np.int32)
+HUE_DIV[1:] = np.rint((180 << HSV_SHIFT) / (6.0 * np.arange(1, 256))).astype(np.int32)
+
+if njit is not None:
+    @njit(cache=True)
+    def count_color_classes(image, hue_class, sat_div, hue_div):
+        """BGR→HSV変換・色分類・集計を1パスで行う（numba使用時）"""
+        height, width = image.shape[0], image.shape[1]
+        counts = np.zeros(4, dtype=np.int64)
+        
+        for y in range(height):
+            for x in range(width):
+                b = np.int32(image[y, x, 0])
+                g = np.int32(image[y, x, 1])
+                r = np.int32(image[y, x, 2])
+                v = max(b, g, r)
+                if v < VALUE_MIN:
+                    continue
+                
+                diff = v - min(b, g, r)
+                s = (diff * sat_div[v] + HSV_ROUND) >> HSV_SHIFT
+                if s < SATURATION_MIN:
+                    continue
+                
+                if v == r:
+                    h = g - b
+                elif v == g:
+                    h = b - r + 2 * diff
+                else:
+                    h = r - g + 4 * diff
+                h = (h * hue_div[diff] + HSV_ROUND) >> HSV_SHIFT
+                if h < 0:
+                    h += 180
+                
+                counts[hue_class[h]] += 1
+        
+        return counts
+    
+    # インポート時にコンパイルしておく（numbaはあるのに失敗した場合のみ警告し、OpenCVの処理を使う）
+    try:
+        count_color_classes(np.zeros((1, 1, 3), dtype=np.uint8), HUE_CLASS, SAT_DIV, HUE_DIV)
+    except Exception as e:
+        print(f"警告: numbaカーネルを利用できません: {e}")
+        count_color_classes = None
+else:
+    count_color_classes = None
+
 def load_image(image_path):
     """画像を読み込む"""
     if not os.path.exists(image_path):
@@ -18,45 +93,39 @@ def load_image(image_path):
     return image
 
 def analyze_lamp_color(image):
-    """ランプの色を分析する"""
+    """ランプの色を分析し、{色名: ピクセル数} を返す（色ごとのマスクは作らずに集計のみ行う）"""
     if image is None:
         return None
     
-    # BGR から HSV 色空間に変換
-    hsv = cv2.cvtColor(image, cv2.COLOR_BGR2HSV)
-    
-    # 色の範囲を定義 (HSV)
-    color_ranges = {
-        '赤': [
-            # 赤色は HSV で 0-10 と 170-180 の範囲にある
-            (np.array([0, 50, 50]), np.array([10, 255, 255])),      # 赤色下限
-            (np.array([170, 50, 50]), np.array([180, 255, 255]))    # 赤色上限
-        ],
-        'オレンジ': [
-            (np.array([11, 50, 50]), np.array([25, 255, 255]))      # オレンジ色
-        ],
-        '緑': [
-            (np.array([40, 50, 50]), np.array([80, 255, 255]))      # 緑色
-        ]
-    }
+    if count_color_classes is not None:
+        # numbaが利用可能なら一時配列を作らずに1パスで集計
+        counts = count_color_classes(np.ascontiguousarray(image), HUE_CLASS, SAT_DIV, HUE_DIV)
+        return color_pixels_from_counts(counts)
     
-    color_pixels = {}
-    masks = {}
+    # 大きな画像はUMatにしてOpenCLで処理（利用できない環境ではCPUのまま）
+    use_opencl = cv2.ocl.haveOpenCL() and image.shape[0] * image.shape[1] >= OPENCL_MIN_PIXELS
+    source = cv2.UMat(image) if use_opencl else image
     
-    for color_name, ranges in color_ranges.items():
-        total_mask = np.zeros(hsv.shape[:2], dtype=np.uint8)
-        
-        for lower, upper in ranges:
-            mask = cv2.inRange(hsv, lower, upper)
-            total_mask = cv2.bitwise_or(total_mask, mask)
-        
-        masks[color_name] = total_mask
-        pixel_count = cv2.countNonZero(total_mask)
-        color_pixels[color_name] = pixel_count
-        
-        print(f"{color_name}のピクセル数: {pixel_count}")
+    # BGR から HSV 色空間に変換
+    hsv = cv2.cvtColor(source, cv2.COLOR_BGR2HSV)
+    
+    # 色相をLUTで一括分類し、彩度・明度の不足する画素は除外
+    classes = cv2.LUT(cv2.extractChannel(hsv, 0), HUE_CLASS)
+    valid = cv2.inRange(hsv, HSV_VALID_LOWER, HSV_VALID_UPPER)
+    cv2.bitwise_and(classes, valid, dst=classes)
     
-    return color_pixels, masks
+    if use_opencl:
+        classes = classes.get()
+    counts = np.bincount(classes.ravel(), minlength=len(COLOR_CLASSES) + 1)
+    return color_pixels_from_counts(counts)
+
+def color_pixels_from_counts(counts):
+    """色クラスごとの集計結果を {色名: ピクセル数} に変換"""
+    color_pixels = {}
+    for color_name, class_id in COLOR_CLASSES.items():
+        color_pixels[color_name] = int(counts[class_id])
+        log.debug("%sのピクセル数: %d", color_name, color_pixels[color_name])
+    return color_pixels
 
 def determine_lamp_color(color_pixels):
     """最も多いピクセル数の色を判定"""
@@ -76,21 +145,28 @@ def determine_lamp_color(color_pixels):
     return color_name, pixel_count
 
 def analyze_brightness(image):
-    """画像の明度を分析してランプが点灯しているかチェック"""
+    """画像の明度を分析してランプが点灯しているかチェック
+    
+    BGR画像またはグレースケール画像を受け付ける
+    """
     if image is None:
         return False, 0
     
-    # グレースケールに変換
-    gray = cv2.cvtColor(image, cv2.COLOR_BGR2GRAY)
+    # グレースケールでなければ変換
+    if image.ndim == 2:
+        gray = image
+    else:
+        gray = cv2.cvtColor(image, cv2.COLOR_BGR2GRAY)
     
-    # 平均明度を計算
-    mean_brightness = np.mean(gray)
+    # 平均明度を計算（OpenCVのSIMD実装で集計）
+    mean_brightness = cv2.mean(gray)[0]
     
     # 最大明度を計算
-    max_brightness = np.max(gray)
+    _, max_value, _, _ = cv2.minMaxLoc(gray)
+    max_brightness = int(max_value)
     
-    print(f"平均明度: {mean_brightness:.2f}")
-    print(f"最大明度: {max_brightness}")
+    log.debug("平均明度: %.2f", mean_brightness)
+    log.debug("最大明度: %d", max_brightness)
     
     # 明度が一定以上なら点灯していると判定
     brightness_threshold = 100  # 調整可能な閾値
@@ -98,48 +174,8 @@ def analyze_brightness(image):
     
     return is_bright, mean_brightness
 
-def display_analysis(image, masks):
-    """分析結果を視覚的に表示"""
-    if image is None:
-        return
-    
-    print("\n視覚的な分析結果を表示しますか？ (y/n): ", end="")
-    choice = input().lower().strip()
-    
-    if choice == 'y' or choice == 'yes':
-        # 元画像を表示
-        cv2.namedWindow('Original Image', cv2.WINDOW_NORMAL)
-        cv2.imshow('Original Image', image)
-        
-        # 各色のマスクを表示
-        for color_name, mask in masks.items():
-            if cv2.countNonZero(mask) > 0:  # ピクセルが存在する場合のみ表示
-                cv2.namedWindow(f'{color_name} Mask', cv2.WINDOW_NORMAL)
-                cv2.imshow(f'{color_name} Mask', mask)
-                
-                # マスクを適用した結果を表示
-                result = cv2.bitwise_and(image, image, mask=mask)
-                cv2.namedWindow(f'{color_name} Detection', cv2.WINDOW_NORMAL)
-                cv2.imshow(f'{color_name} Detection', result)
-        
-        print("何かキーを押すと終了します...")
-        cv2.waitKey(0)
-        cv2.destroyAllWindows()
-
-def analyze_single_image(image_path, expected_color):
-    """単一画像で期待される色の含有率を分析"""
-    print(f"\n{expected_color}の分析中...")
-    print("-" * 30)
-    
-    image = load_image(image_path)
-    if image is None:
-        return None
-    
-    # 色分析
-    color_pixels, masks = analyze_lamp_color(image)
-    if not color_pixels:
-        return None
-    
+def build_color_result(file_name, expected_color, color_pixels, image):
+    """色ピクセル数と明度から分析結果を作成"""
     # 期待される色のピクセル数を取得
     expected_pixels = color_pixels.get(expected_color, 0)
     total_pixels = sum(color_pixels.values())
@@ -149,11 +185,12 @@ def analyze_single_image(image_path, expected_color):
     else:
         percentage = 0
     
-    # 明度分析
-    is_bright, brightness = analyze_brightness(image)
+    # 明度分析（読み込み済みの画像からグレースケールを一度だけ生成）
+    gray = cv2.cvtColor(image, cv2.COLOR_BGR2GRAY)
+    is_bright, brightness = analyze_brightness(gray)
     
     result = {
-        'file_name': os.path.basename(image_path),
+        'file_name': file_name,
         'expected_color': expected_color,
         'expected_pixels': expected_pixels,
         'total_color_pixels': total_pixels,
@@ -170,67 +207,104 @@ def analyze_single_image(image_path, expected_color):
     
     return result
 
+def count_colors_batch(crops):
+    """複数の切り出し画像の色ピクセル数を1回の変換でまとめて集計"""
+    if count_color_classes is not None:
+        # numbaが利用可能なら画像ごとに一時配列を作らず1パスで集計（積み重ねのコピーも不要）
+        return [color_pixels_from_counts(count_color_classes(np.ascontiguousarray(crop), HUE_CLASS, SAT_DIV, HUE_DIV))
+                for crop in crops]
+    
+    max_height = max(crop.shape[0] for crop in crops)
+    max_width = max(crop.shape[1] for crop in crops)
+    
+    # サイズの異なる画像を黒でパディングして積み重ねる
+    # (明度0の画素はどの色にも分類されないため集計に影響しない)
+    stacked = np.zeros((len(crops), max_height, max_width, 3), dtype=np.uint8)
+    for i, crop in enumerate(crops):
+        stacked[i, :crop.shape[0], :crop.shape[1]] = crop
+    
+    hsv = cv2.cvtColor(stacked.reshape(-1, max_width, 3), cv2.COLOR_BGR2HSV)
+    classes = cv2.LUT(cv2.extractChannel(hsv, 0), HUE_CLASS)
+    valid = cv2.inRange(hsv, HSV_VALID_LOWER, HSV_VALID_UPPER)
+    cv2.bitwise_and(classes, valid, dst=classes)
+    
+    # 画像ごとにクラスIDをずらして1回のbincountで集計
+    class_count = len(COLOR_CLASSES) + 1
+    offsets = (np.arange(len(crops)) * class_count).astype(np.int64)
+    labels = classes.reshape(len(crops), -1) + offsets[:, None]
+    counts = np.bincount(labels.ravel(), minlength=len(crops) * class_count).reshape(len(crops), class_count)
+    
+    return [{color_name: int(row[class_id]) for color_name, class_id in COLOR_CLASSES.items()}
+            for row in counts]
+
+def analyze_batch(crops, expected_colors, file_names=None):
+    """複数の切り出し画像をまとめて分析"""
+    if not crops:
+        return []
+    
+    if file_names is None:
+        file_names = [f"crop_{i + 1}" for i in range(len(crops))]
+    
+    results = []
+    for crop, expected_color, file_name, color_pixels in zip(
+            crops, expected_colors, file_names, count_colors_batch(crops)):
+        print(f"\n{expected_color}の分析中...")
+        print("-" * 30)
+        for color_name, pixel_count in color_pixels.items():
+            log.debug("%sのピクセル数: %d", color_name, pixel_count)
+        results.append(build_color_result(file_name, expected_color, color_pixels, crop))
+    
+    return results
+
 def comprehensive_judgment(results):
     """総合的な判定を行う"""
     if not results or len(results) != 3:
-        return "判定不可", "分析結果が不完全です"
+        return "判定不可", 0, ["分析結果が不完全です"]
     
     print("\n" + "=" * 50)
     print("🔍 総合判定")
     print("=" * 50)
     
     # 各ファイルの結果を評価
-    scores = {}
     threshold = 30.0  # 期待色の最小割合閾値（調整可能）
     brightness_threshold = 80.0  # 明度閾値
     
-    for result in results:
-        color = result['expected_color']
-        percentage = result['percentage']
-        brightness = result['brightness']
-        
-        # スコア計算（期待色割合 + 明度ボーナス）
-        score = percentage
-        if brightness > brightness_threshold:
-            score += 10  # 明度ボーナス
-        
-        scores[color] = {
-            'score': score,
-            'percentage': percentage,
-            'brightness': brightness,
-            'meets_threshold': percentage >= threshold
-        }
-        
-        print(f"{color}ファイル:")
-        print(f"  期待色割合: {percentage:.1f}%")
-        print(f"  明度: {brightness:.2f}")
+    # スコア計算（期待色割合 + 明度ボーナス）を1回だけ行う
+    scores = [result['percentage'] + (10 if result['brightness'] > brightness_threshold else 0)
+              for result in results]
+    
+    for result, score in zip(results, scores):
+        print(f"{result['expected_color']}ファイル:")
+        print(f"  期待色割合: {result['percentage']:.1f}%")
+        print(f"  明度: {result['brightness']:.2f}")
         print(f"  スコア: {score:.1f}")
-        print(f"  閾値クリア: {'✓' if percentage >= threshold else '✗'}")
+        print(f"  閾値クリア: {'✓' if result['percentage'] >= threshold else '✗'}")
         print()
     
     # 最高スコアの色を判定
-    best_color = max(scores.items(), key=lambda x: x[1]['score'])
-    color_name, color_data = best_color
+    best_index = max(range(len(results)), key=scores.__getitem__)
+    best = results[best_index]
+    color_name = best['expected_color']
+    meets_threshold = best['percentage'] >= threshold
     
     # 判定理由を生成
     reasons = []
     
-    if color_data['meets_threshold']:
-        reasons.append(f"{color_name}の含有率が{color_data['percentage']:.1f}%で閾値({threshold}%)を超過")
+    if meets_threshold:
+        reasons.append(f"{color_name}の含有率が{best['percentage']:.1f}%で閾値({threshold}%)を超過")
     
-    if color_data['brightness'] > brightness_threshold:
-        reasons.append(f"十分な明度({color_data['brightness']:.1f})を検出")
+    if best['brightness'] > brightness_threshold:
+        reasons.append(f"十分な明度({best['brightness']:.1f})を検出")
     
     # 他の色との比較
-    other_colors = [c for c in scores.keys() if c != color_name]
-    for other_color in other_colors:
-        if scores[other_color]['percentage'] < threshold:
-            reasons.append(f"{other_color}は含有率{scores[other_color]['percentage']:.1f}%で閾値未満")
+    for i, other in enumerate(results):
+        if i != best_index and other['percentage'] < threshold:
+            reasons.append(f"{other['expected_color']}は含有率{other['percentage']:.1f}%で閾値未満")
     
     # 最終判定
-    if color_data['meets_threshold']:
+    if meets_threshold:
         judgment = color_name
-        confidence = min(95, color_data['score'])  # 最大95%
+        confidence = min(95, scores[best_index])  # 最大95%
     else:
         judgment = "不明"
         confidence = 0
@@ -251,17 +325,24 @@ def main():
         ("red.png", "赤")
     ]
     
-    results = []
+    crops = []
+    expected_colors = []
+    file_names = []
     
-    # 各ファイルを分析
+    # 各ファイルを読み込み
     for filename, expected_color in target_files:
         image_path = os.path.join("sample_img", filename)
-        result = analyze_single_image(image_path, expected_color)
-        if result:
-            results.append(result)
+        image = load_image(image_path)
+        if image is not None:
+            crops.append(image)
+            expected_colors.append(expected_color)
+            file_names.append(filename)
         else:
             print(f"⚠️ {filename}の分析に失敗しました")
     
+    # 読み込めたファイルをまとめて分析
+    results = analyze_batch(crops, expected_colors, file_names)
+    
     # 総合判定
     if results:
         judgment, confidence, reasons = comprehensive_judgment(results)
@@ -286,4 +367,5 @@ def main():
         print("❌ すべてのファイルの分析に失敗しました")
 
 if __name__ == "__main__":
+    logging.basicConfig(level=logging.WARNING, format='%(message)s')
     main()
@@ -5,92 +5,183 @@
 Flask を使用してsetting.jsonを編集し、main.pyを再実行
 """
 
-from flask import Flask, render_template, request, jsonify, redirect, url_for, Response
+from flask import Flask, render_template, request, jsonify, redirect, url_for, Response, g, has_request_context, send_from_directory
+from werkzeug.exceptions import NotFound
 import json
 import os
+import functools
+try:
+    import orjson  # 高速なJSON (de)シリアライザ（未インストールなら標準のjsonを使用）
+except ImportError:
+    orjson = None
+try:
+    from turbojpeg import TurboJPEG, TJPF_BGR, TJSAMP_420  # libjpeg-turbo（未インストールならcv2.imencodeを使用）
+    turbo_jpeg = TurboJPEG()
+except (ImportError, OSError, RuntimeError):
+    turbo_jpeg = None
 import subprocess
 import threading
 import time
 import signal
-import psutil
+import sys
+from collections import deque
 import cv2
 import numpy as np
 from datetime import datetime, timedelta
 import base64
 import csv
-import matplotlib
-matplotlib.use('Agg')  # GUI不要のバックエンドを使用
-import matplotlib.pyplot as plt
-import matplotlib.dates as mdates
-
-# matplotlib の設定
-matplotlib.rcParams['axes.formatter.limits'] = [-5, 6]
-matplotlib.rcParams['axes.formatter.use_mathtext'] = True
-# 図の最大数制限（警告を防ぐ）
-matplotlib.rcParams['figure.max_open_warning'] = 50
 from io import BytesIO
-import pandas as pd
+from coordinate_setter import format_coordinates_preview
 
 app = Flask(__name__)
 app.secret_key = 'lamp_detection_system_secret_key'
 
+if orjson is not None:
+    from flask.json.provider import DefaultJSONProvider
+    
+    class OrjsonProvider(DefaultJSONProvider):
+        """jsonify/request.get_jsonでorjsonを使うJSONプロバイダー（キー順などは標準と同じ）"""
+        
+        def dumps_bytes(self, obj, indent=False, newline=False):
+            """orjsonでUTF-8のバイト列に直接シリアライズ"""
+            option = orjson.OPT_SORT_KEYS | orjson.OPT_NON_STR_KEYS | orjson.OPT_SERIALIZE_NUMPY
+            if indent:
+                option |= orjson.OPT_INDENT_2
+            if newline:
+                option |= orjson.OPT_APPEND_NEWLINE
+            return orjson.dumps(obj, default=self.default, option=option)
+        
+        def dumps(self, obj, **kwargs):
+            return self.dumps_bytes(obj, indent=kwargs.get('indent')).decode('utf-8')
+        
+        def loads(self, s, **kwargs):
+            return orjson.loads(s)
+        
+        def response(self, *args, **kwargs):
+            # strを経由せずバイト列をそのままレスポンスにする（整形の条件は標準と同じ）
+            obj = self._prepare_response_obj(args, kwargs)
+            indent = self.compact is False or (self.compact is None and self._app.debug)
+            return self._app.response_class(self.dumps_bytes(obj, indent=indent, newline=True),
+                                            mimetype=self.mimetype)
+    
+    app.json = OrjsonProvider(app)
+
 # グローバル変数
 main_process = None
 main_process_thread = None
+main_process_lock = threading.RLock()  # main.pyの開始・停止・再起動を直列化
+main_process_stopped_at = None  # main.pyを最後に停止した時刻（time.monotonic）
+camera_released_at = None  # 共有カメラを最後に解放した時刻（time.monotonic）
 camera_feed = None
 camera_thread = None
 camera_running = False
+camera_index_cache = None  # find_available_camera() で見つかったカメラ番号
+camera_frames = deque(maxlen=1)  # 共有カメラの最新フレームと取得時刻（1枚のみ保持）
+camera_frame_ready = threading.Event()
+camera_frame_wanted = threading.Event()  # セットされている間だけキャプチャスレッドがデコードする
+camera_last_requested = 0.0  # 共有カメラのフレームが最後に要求された時刻（time.monotonic）
+camera_lock = threading.Lock()  # 共有カメラの開始・停止を直列化
+main_status_thread = None
+main_status = {'running': False, 'pid': None, 'error': None, 'id': 0}  # SSEで配信するmain.pyの状態（idは変化のたびに増える）
+main_status_changed = threading.Condition()
 
 # ========================================
 # 設定ファイル管理
 # ========================================
 
+@functools.lru_cache(maxsize=1)
+def _load_settings_cached(stamp):
+    """setting.jsonを読み込む（(更新時刻ns, サイズ) ごとにキャッシュ）"""
+    if orjson is not None:
+        with open('setting.json', 'rb') as f:
+            return orjson.loads(f.read())
+    with open('setting.json', 'r', encoding='utf-8') as f:
+        return json.load(f)
+
 def load_settings():
-    """setting.jsonから設定を読み込む"""
+    """setting.jsonから設定を読み込む（ファイルが更新されていなければキャッシュを返す）"""
     try:
-        with open('setting.json', 'r', encoding='utf-8') as f:
-            return json.load(f)
+        stat = os.stat('setting.json')
+        return _load_settings_cached((stat.st_mtime_ns, stat.st_size))
     except Exception as e:
         print(f"設定ファイルの読み込みエラー: {e}")
         return None
 
+settings_save_lock = threading.Lock()
+
 def save_settings(settings):
-    """設定をsetting.jsonに保存"""
+    """設定をsetting.jsonに保存
+    
+    一時ファイルに書いてから置き換えるので、main.pyなどが書きかけのファイルを読むことはない
+    """
     try:
-        with open('setting.json', 'w', encoding='utf-8') as f:
-            json.dump(settings, f, indent=2, ensure_ascii=False)
+        if orjson is not None:
+            data = orjson.dumps(settings, option=orjson.OPT_INDENT_2 | orjson.OPT_NON_STR_KEYS)
+        else:
+            data = json.dumps(settings, indent=2, ensure_ascii=False).encode('utf-8')
+        
+        # 設定保存と座標保存が同時に走っても一時ファイルを共有しないよう、保存は1スレッドずつ行う
+        with settings_save_lock:
+            temp_path = 'setting.json.tmp'
+            with open(temp_path, 'wb') as f:
+                f.write(data)
+            try:
+                os.replace(temp_path, 'setting.json')
+            except PermissionError:
+                # Windowsでは他のプロセスが開いていると置き換えられないため直接書き込む
+                with open('setting.json', 'wb') as f:
+                    f.write(data)
+                os.remove(temp_path)
+            _load_settings_cached.cache_clear()
         return True
     except Exception as e:
         print(f"設定ファイルの保存エラー: {e}")
         return False
 
+# 数値設定の許容範囲（値の取り出し方は読み込み時に決めておく）
+NUMERIC_SETTING_CHECKS = (
+    ('detection.detection_interval_seconds', lambda s: s['detection']['detection_interval_seconds'], 1, 3600),
+    ('detection.notification_threshold_minutes', lambda s: s['detection']['notification_threshold_minutes'], 1, 120),
+    ('detection.color_detection_threshold_percentage', lambda s: s['detection']['color_detection_threshold_percentage'], 0, 100),
+    ('camera.search_range', lambda s: s['camera']['search_range'], 1, 10),
+    ('camera.preview_jpeg_quality', lambda s: s['camera'].get('preview_jpeg_quality', COORDINATE_PREVIEW_QUALITY), 1, 100),
+)
+
+LAMP_COLORS = ('orange', 'green')
+COORDINATE_KEYS = ('x1', 'y1', 'x2', 'y2')
+
+def validate_coordinates_payload(coordinates):
+    """座標保存APIの入力を検証し、問題があればエラーメッセージを返す（問題なければNone）"""
+    for color in LAMP_COLORS:
+        coord_data = coordinates.get(color)
+        if not isinstance(coord_data, dict):
+            return f'{color}の座標が見つかりません'
+        
+        for key in COORDINATE_KEYS:
+            value = coord_data.get(key)
+            if value is None:
+                return f'{color}の{key}座標が見つかりません'
+            # 数値かどうかチェック（JSONのtrue/falseはboolなので除外）
+            if isinstance(value, bool) or not isinstance(value, (int, float)):
+                return f'{color}の{key}座標が数値ではありません'
+    return None
+
 def validate_settings(settings):
     """設定値のバリデーション"""
     errors = []
     
     # 座標の検証
-    for color in ['orange', 'green']:
+    for color in LAMP_COLORS:
         coords = settings.get('coordinates', {}).get(color, {})
-        if not all(key in coords for key in ['x1', 'y1', 'x2', 'y2']):
+        if not all(key in coords for key in COORDINATE_KEYS):
             errors.append(f"{color}の座標が不完全です")
         elif coords['x1'] >= coords['x2'] or coords['y1'] >= coords['y2']:
             errors.append(f"{color}の座標が無効です (x1 < x2, y1 < y2 である必要があります)")
     
     # 数値の検証
-    numeric_checks = [
-        ('detection.detection_interval_seconds', 1, 3600),
-        ('detection.notification_threshold_minutes', 1, 120),
-        ('detection.color_detection_threshold_percentage', 0, 100),
-        ('camera.search_range', 1, 10)
-    ]
-    
-    for key_path, min_val, max_val in numeric_checks:
-        keys = key_path.split('.')
-        value = settings
+    for key_path, get_value, min_val, max_val in NUMERIC_SETTING_CHECKS:
         try:
-            for key in keys:
-                value = value[key]
-            if not (min_val <= value <= max_val):
+            if not (min_val <= get_value(settings) <= max_val):
                 errors.append(f"{key_path}の値が範囲外です ({min_val}-{max_val})")
         except (KeyError, TypeError):
             errors.append(f"{key_path}が見つかりません")
@@ -101,90 +192,203 @@ def validate_settings(settings):
 # main.py プロセス管理
 # ========================================
 
+# 子プロセスの作業ディレクトリ（起動元のカレントディレクトリに依存しない）
+APP_DIR = os.path.dirname(os.path.abspath(__file__))
+
+# main_auto.py用の環境変数（起動のたびにos.environを複製しない）
+MAIN_PROCESS_ENV = dict(os.environ, LAMP_AUTO_MODE='4')  # ライブカメラモードを自動選択
+
 def is_main_running():
-    """main.pyが実行中かチェック"""
+    """main.pyが実行中かチェック
+    
+    poll()は子プロセスをwaitpid(WNOHANG)で確認するだけなので毎フレーム呼んでも軽い。
+    終了した子プロセスは回収されるまでPIDが再利用されないため、別プロセスと取り違えることもない
+    """
     global main_process
     return main_process is not None and main_process.poll() is None
 
+def is_main_running_cached():
+    """リクエスト処理中はis_main_running()の結果をflask.gに保持して使い回す
+    
+    リクエスト外（カメラ・配信スレッド）から呼ばれた場合は毎回確認する。
+    開始・停止処理は状態が変わるためis_main_running()を直接使うこと
+    """
+    if not has_request_context():
+        return is_main_running()
+    if 'main_running' not in g:
+        g.main_running = is_main_running()
+    return g.main_running
+
+# main.pyの終了後、カメラドライバがデバイスを解放するまでの待ち時間（秒）
+CAMERA_RELEASE_SECONDS = 2
+
+def wait_for_camera_release():
+    """main.pyの停止・共有カメラの解放の直後なら、遅い方からCAMERA_RELEASE_SECONDS経つまでだけ待つ
+    
+    プロセスの終了やスレッドの終了は確認済みなので、
+    ここで待つのはドライバ側の解放分のみ（どちらも時間が経っていれば待たない）
+    """
+    released_times = [t for t in (main_process_stopped_at, camera_released_at) if t is not None]
+    if not released_times:
+        return
+    remaining = CAMERA_RELEASE_SECONDS - (time.monotonic() - max(released_times))
+    if remaining > 0:
+        time.sleep(remaining)
+
 def start_main_process():
     """main.pyを開始"""
     global main_process, main_process_thread
     
-    if is_main_running():
-        print("[INFO] main.pyは既に実行中です")
-        return False
-    
-    try:
-        # main.pyを別プロセスで実行（カメラモードで自動実行）
-        # 環境変数でメニュー選択を自動化
-        env = os.environ.copy()
-        env['LAMP_AUTO_MODE'] = '4'  # ライブカメラモードを自動選択
-        
-        main_process = subprocess.Popen(
-            ['python', 'main_auto.py'],  # 自動実行版を使用
-            env=env,
-            creationflags=subprocess.CREATE_NEW_CONSOLE if os.name == 'nt' else 0,  # Windowsで新しいコンソールを作成
-            stdout=None,  # 出力をブロックしない
-            stderr=None
-        )
-        print(f"[INFO] main.pyを開始しました (PID: {main_process.pid})")
-        return True
-    except Exception as e:
-        print(f"[ERROR] main.pyの開始に失敗: {e}")
-        return False
+    with main_process_lock:
+        if is_main_running():
+            print("[INFO] main.pyは既に実行中です")
+            return False
+        
+        # main.pyがカメラを開けるよう共有カメラを解放
+        stop_camera_feed()
+        wait_for_camera_release()
+        
+        try:
+            # main.pyを別プロセスで実行（カメラモードで自動実行）
+            # 環境変数でメニュー選択を自動化
+            main_process = subprocess.Popen(
+                [sys.executable, 'main_auto.py'],  # 自動実行版を使用（PATH検索しない）
+                cwd=APP_DIR,
+                env=MAIN_PROCESS_ENV,
+                creationflags=subprocess.CREATE_NEW_CONSOLE if os.name == 'nt' else 0,  # Windowsで新しいコンソールを作成
+                stdout=None,  # 出力をブロックしない
+                stderr=None
+            )
+            print(f"[INFO] main.pyを開始しました (PID: {main_process.pid})")
+            update_main_status()  # SSEの接続に即時通知
+            return True
+        except Exception as e:
+            print(f"[ERROR] main.pyの開始に失敗: {e}")
+            return False
 
 def stop_main_process():
     """main.pyを停止"""
-    global main_process
-    
-    if not is_main_running():
-        print("[INFO] main.pyは実行されていません")
-        return True
+    global main_process, main_process_stopped_at
     
-    try:
-        # プロセスを終了
-        main_process.terminate()
-        main_process.wait(timeout=10)
-        print("[INFO] main.pyを正常に停止しました")
-        main_process = None
-        return True
-    except subprocess.TimeoutExpired:
-        # 強制終了
-        main_process.kill()
-        main_process.wait()
-        print("[INFO] main.pyを強制終了しました")
-        main_process = None
-        return True
-    except Exception as e:
-        print(f"[ERROR] main.pyの停止に失敗: {e}")
-        return False
+    with main_process_lock:
+        if not is_main_running():
+            print("[INFO] main.pyは実行されていません")
+            return True
+        
+        try:
+            # プロセスを終了
+            main_process.terminate()
+            main_process.wait(timeout=10)
+            print("[INFO] main.pyを正常に停止しました")
+            main_process = None
+            main_process_stopped_at = time.monotonic()
+            update_main_status()  # SSEの接続に即時通知
+            return True
+        except subprocess.TimeoutExpired:
+            # 強制終了
+            main_process.kill()
+            main_process.wait()
+            print("[INFO] main.pyを強制終了しました")
+            main_process = None
+            main_process_stopped_at = time.monotonic()
+            update_main_status()  # SSEの接続に即時通知
+            return True
+        except Exception as e:
+            print(f"[ERROR] main.pyの停止に失敗: {e}")
+            return False
 
 def restart_main_process():
     """main.pyを再起動"""
     print("[INFO] main.pyを再起動中...")
     
-    # 停止
-    if is_main_running():
-        stop_main_process()
-        time.sleep(2)  # 少し待機
-    
-    # 開始
-    return start_main_process()
+    with main_process_lock:
+        # 停止
+        if is_main_running():
+            stop_main_process()
+        
+        # 開始（カメラの解放待ちはstart_main_process内で行う）
+        return start_main_process()
+
+def update_main_status():
+    """main.pyの状態を確認し、変化していればSSEの接続に通知"""
+    proc = main_process  # 停止処理でNoneにされても途中で変わらないよう1回だけ読む
+    running = proc is not None and proc.poll() is None
+    pid = proc.pid if running else None
+    with main_status_changed:
+        if (running, pid) != (main_status['running'], main_status['pid']):
+            # 状態が変わったら以前の失敗は解消したものとしてエラーを消す
+            main_status.update(running=running, pid=pid, error=None, id=main_status['id'] + 1)
+            main_status_changed.notify_all()
+
+def report_main_status_error(message):
+    """バックグラウンド処理の失敗をSSEの接続に通知（リクエストには結果を返せないため）"""
+    with main_status_changed:
+        main_status.update(error=message, id=main_status['id'] + 1)
+        main_status_changed.notify_all()
+
+def main_status_watch_loop():
+    """全てのSSE接続の代わりにmain.pyの状態を1秒ごとに1回だけ確認する"""
+    while True:
+        try:
+            update_main_status()
+        except Exception as e:
+            # 1回の失敗で監視スレッドが終了すると全てのSSE接続が更新されなくなるため、記録して続行する
+            print(f"[ERROR] main.py状態監視エラー: {e}")
+        time.sleep(1)
+
+def start_main_status_watcher():
+    """状態監視スレッドを開始（既に動いていれば何もしない）"""
+    global main_status_thread
+    
+    with main_status_changed:
+        if main_status_thread is None or not main_status_thread.is_alive():
+            update_main_status()  # 最初の接続にも現在の状態を送れるようにする
+            main_status_thread = threading.Thread(target=main_status_watch_loop, daemon=True)
+            main_status_thread.start()
+
+def restart_main_process_in_background():
+    """main.pyを再起動し、失敗した場合はSSEで通知する"""
+    try:
+        success = restart_main_process()
+    except Exception as e:
+        print(f"[ERROR] main.pyの再起動に失敗: {e}")
+        success = False
+    if not success:
+        report_main_status_error('main.pyの再起動に失敗しました')
+
+def restart_main_process_async():
+    """main.pyの再起動をバックグラウンドで実行（リクエストスレッドを待たせない）"""
+    thread = threading.Thread(target=restart_main_process_in_background, daemon=True)
+    thread.start()
+    return thread
 
 # ========================================
 # Flaskルート
 # ========================================
 
+# 設定と実行状態が変わらない間は描画済みHTMLを使い回す（テンプレート名 -> (settings, main_running, html)）
+page_cache = {}
+
+def render_cached_page(template_name, settings, main_running):
+    """settingsとmain_runningだけに依存するページを描画（変化がなければキャッシュを返す）
+    
+    load_settings()はファイルが変わらない限り同じ辞書を返すので、同一オブジェクトかで判定する
+    """
+    if app.jinja_env.auto_reload:  # テンプレート編集を即時反映する設定（debug時など）ではキャッシュしない
+        return render_template(template_name, settings=settings, main_running=main_running)
+    
+    cached = page_cache.get(template_name)
+    if cached is not None and cached[0] is settings and cached[1] == main_running:
+        return cached[2]
+    
+    html = render_template(template_name, settings=settings, main_running=main_running)
+    page_cache[template_name] = (settings, main_running, html)
+    return html
+
 @app.route('/')
 def index():
     """メインページ"""
-    settings = load_settings()
-    main_running = is_main_running()
-    
-    return render_template('index.html', 
-                         settings=settings, 
-                         main_running=main_running,
-                         current_time=datetime.now().strftime('%Y-%m-%d %H:%M:%S'))
+    return render_cached_page('index.html', load_settings(), is_main_running_cached())
 
 @app.route('/api/settings', methods=['GET'])
 def get_settings_api():
@@ -206,6 +410,10 @@ def update_settings_api():
         if errors:
             return jsonify({'success': False, 'errors': errors}), 400
         
+        # 内容が変わっていなければ書き込まない
+        if new_settings == load_settings():
+            return jsonify({'success': True, 'message': '設定に変更はありません'})
+        
         # 保存
         if save_settings(new_settings):
             return jsonify({'success': True, 'message': '設定を保存しました'})
@@ -218,7 +426,7 @@ def update_settings_api():
 @app.route('/api/main/status', methods=['GET'])
 def get_main_status():
     """main.pyの実行状態を取得"""
-    running = is_main_running()
+    running = is_main_running_cached()
     pid = main_process.pid if main_process else None
     
     return jsonify({
@@ -227,15 +435,48 @@ def get_main_status():
         'timestamp': datetime.now().isoformat()
     })
 
+@app.route('/api/main/status/stream', methods=['GET'])
+def stream_main_status():
+    """main.pyの実行状態をServer-Sent Eventsで通知（状態が変わったときだけ送信）
+    
+    状態の確認は監視スレッドが1か所で行い、各接続は変化の通知を待つだけ
+    """
+    start_main_status_watcher()
+    
+    def generate():
+        last_id = None
+        started = time.monotonic()
+        
+        # 接続を使い続けないよう一定時間で終了する（ブラウザが自動で再接続する）
+        while time.monotonic() - started < 300:
+            with main_status_changed:
+                # 15秒変化がなければ接続維持用のコメント行を送る
+                changed = main_status_changed.wait_for(lambda: main_status['id'] != last_id, timeout=15)
+                status = dict(main_status)
+            
+            if changed:
+                last_id = status['id']
+                data = json.dumps({
+                    'running': status['running'],
+                    'pid': status['pid'],
+                    'error': status['error'],
+                    'timestamp': datetime.now().isoformat()
+                })
+                yield f"data: {data}\n\n"
+            else:
+                yield ": keep-alive\n\n"
+    
+    return Response(generate(), mimetype='text/event-stream',
+                    headers={'Cache-Control': 'no-cache', 'X-Accel-Buffering': 'no'})
+
 @app.route('/api/main/restart', methods=['POST'])
 def restart_main():
     """main.pyを再起動"""
     try:
-        success = restart_main_process()
-        if success:
-            return jsonify({'success': True, 'message': 'main.pyを再起動しました'})
-        else:
-            return jsonify({'success': False, 'error': 'main.pyの再起動に失敗しました'}), 500
+        # 停止の待ち時間があるため結果は待たずに受け付けだけ返す
+        # （結果は /api/main/status/stream で通知し、失敗した場合はerrorに理由が入る）
+        restart_main_process_async()
+        return jsonify({'success': True, 'status': 'pending', 'message': 'main.pyの再起動を受け付けました'}), 202
     except Exception as e:
         return jsonify({'success': False, 'error': str(e)}), 500
 
@@ -271,7 +512,7 @@ def stop_main():
 def get_monitoring_status():
     """監視システムの状態を取得"""
     try:
-        running = is_main_running()
+        running = is_main_running_cached()
         pid = main_process.pid if main_process else None
         
         return jsonify({
@@ -283,6 +524,23 @@ def get_monitoring_status():
     except Exception as e:
         return jsonify({'success': False, 'error': str(e)}), 500
 
+@app.route('/api/state', methods=['GET'])
+def get_dashboard_state():
+    """監視ページの表示に必要な状態（実行状態と設定）をまとめて取得"""
+    try:
+        running = is_main_running_cached()
+        pid = main_process.pid if main_process else None
+        
+        return jsonify({
+            'running': running,
+            'pid': pid,
+            'timestamp': datetime.now().isoformat(),
+            'uptime': None,  # 将来的な拡張用
+            'settings': load_settings()
+        })
+    except Exception as e:
+        return jsonify({'success': False, 'error': str(e)}), 500
+
 @app.route('/api/monitoring/start', methods=['POST'])
 def start_monitoring():
     """監視システムを開始"""
@@ -318,33 +576,64 @@ def get_latest_image():
         # streaming/current_frame.jpgを確認
         current_frame_path = os.path.join("streaming", "current_frame.jpg")
         
-        if os.path.exists(current_frame_path):
-            # ファイルの更新時刻をチェック
-            file_time = os.path.getmtime(current_frame_path)
-            current_time = time.time()
-            
-            # 5分以上古い場合は「接続なし」画像を返す
-            if current_time - file_time > 300:  # 5分
-                error_frame = create_no_connection_frame()
-                _, buffer = cv2.imencode('.jpg', error_frame)
-                return Response(buffer.tobytes(), mimetype='image/jpeg')
-            
-            # 最新の画像ファイルを返す
-            with open(current_frame_path, 'rb') as f:
-                image_data = f.read()
-            
-            return Response(image_data, mimetype='image/jpeg')
-        else:
+        try:
+            stat = os.stat(current_frame_path)
+        except FileNotFoundError:
             # 画像がない場合は「待機中」画像を返す
-            waiting_frame = create_waiting_frame()
-            _, buffer = cv2.imencode('.jpg', waiting_frame)
-            return Response(buffer.tobytes(), mimetype='image/jpeg')
+            return Response(WAITING_FRAME_JPEG, mimetype='image/jpeg')
+        
+        # 5分以上古い場合は「接続なし」画像を返す
+        if time.time() - stat.st_mtime > 300:  # 5分
+            return Response(NO_CONNECTION_FRAME_JPEG, mimetype='image/jpeg')
+        
+        # 最新の画像ファイルを返す
+        return streaming_frame_response(current_frame_path, stat)
             
     except Exception as e:
         print(f"[ERROR] 最新画像取得エラー: {e}")
-        error_frame = create_error_frame()
-        _, buffer = cv2.imencode('.jpg', error_frame)
-        return Response(buffer.tobytes(), mimetype='image/jpeg')
+        return Response(ERROR_FRAME_JPEG, mimetype='image/jpeg')
+
+# /api/image/stream がcurrent_frame.jpgの更新を確認する間隔（秒）
+IMAGE_STREAM_POLL_SECONDS = 0.1
+# 画像が更新されなくてもこの間隔で再送し、切断された接続を検出する（秒）
+IMAGE_STREAM_RESEND_SECONDS = 10
+# 1本のストリームがwaitressのワーカースレッドを占有し続けないよう、この時間で終了する（ページ側で接続し直す）
+IMAGE_STREAM_MAX_SECONDS = 300
+
+@app.route('/api/image/stream', methods=['GET'])
+def stream_latest_image():
+    """最新の画像をMJPEG（multipart/x-mixed-replace）で配信
+    
+    1本の接続でcurrent_frame.jpgが更新されるたびに送信する。
+    main.pyが停止するか、IMAGE_STREAM_MAX_SECONDS経ったら終了する（ページ側で接続し直す）
+    """
+    current_frame_path = os.path.join("streaming", "current_frame.jpg")
+    
+    def generate():
+        last_stamp = None
+        last_sent = 0.0
+        started = time.monotonic()
+        while is_main_running() and time.monotonic() - started < IMAGE_STREAM_MAX_SECONDS:
+            try:
+                stat = os.stat(current_frame_path)
+                if time.time() - stat.st_mtime > 300:  # 5分以上古い
+                    stamp, frame = 'stale', NO_CONNECTION_FRAME_JPEG
+                else:
+                    stamp = (stat.st_mtime_ns, stat.st_size)
+                    frame = _read_streaming_frame(current_frame_path, stamp)
+            except FileNotFoundError:
+                stamp, frame = 'waiting', WAITING_FRAME_JPEG
+            except Exception as e:
+                print(f"[ERROR] 画像ストリームエラー: {e}")
+                stamp, frame = 'error', ERROR_FRAME_JPEG
+            
+            now = time.monotonic()
+            if stamp != last_stamp or now - last_sent >= IMAGE_STREAM_RESEND_SECONDS:
+                last_stamp, last_sent = stamp, now
+                yield mjpeg_part(frame)
+            time.sleep(IMAGE_STREAM_POLL_SECONDS)
+    
+    return Response(generate(), mimetype='multipart/x-mixed-replace; boundary=frame')
 
 @app.route('/api/image/capture', methods=['POST'])
 def capture_image():
@@ -356,44 +645,28 @@ def capture_image():
             os.makedirs(sample_img_dir)
             print(f"[INFO] ディレクトリを作成しました: {sample_img_dir}")
         
-        # カメラから画像をキャプチャ
+        # 共有カメラから画像をキャプチャ
         print("[DEBUG] カメラキャプチャ開始")
-        camera_index = find_available_camera()
-        if camera_index is None:
-            print("[ERROR] カメラが見つかりません")
+        frame = get_camera_frame()
+        if frame is None:
+            print("[ERROR] カメラからフレームを取得できませんでした")
             return jsonify({'success': False, 'message': 'カメラが利用できません。カメラが接続されているか確認してください。'})
         
-        print(f"[DEBUG] カメラデバイス {camera_index} を開いています...")
-        cap = cv2.VideoCapture(camera_index)
-        if not cap.isOpened():
-            print(f"[ERROR] カメラデバイス {camera_index} を開けませんでした")
-            return jsonify({'success': False, 'message': f'カメラデバイス {camera_index} を開けませんでした'})
+        # タイムスタンプ付きのファイル名で保存
+        timestamp = datetime.now().strftime("%Y%m%d_%H%M%S")
+        capture_filename = f"manual_capture_{timestamp}.png"
+        capture_path = os.path.join(sample_img_dir, capture_filename)
         
-        try:
-            print("[DEBUG] フレームを取得中...")
-            ret, frame = cap.read()
-            if not ret:
-                print("[ERROR] フレームを取得できませんでした")
-                return jsonify({'success': False, 'message': 'フレームを取得できませんでした'})
-            
-            # タイムスタンプ付きのファイル名で保存
-            timestamp = datetime.now().strftime("%Y%m%d_%H%M%S")
-            capture_filename = f"manual_capture_{timestamp}.png"
-            capture_path = os.path.join(sample_img_dir, capture_filename)
-            
-            if cv2.imwrite(capture_path, frame):
-                print(f"[SUCCESS] 画像をキャプチャしました: {capture_path}")
-                return jsonify({
-                    'success': True, 
-                    'message': f'画像をキャプチャしました: {capture_filename}',
-                    'filename': capture_filename,
-                    'image_path': capture_path
-                })
-            else:
-                return jsonify({'success': False, 'message': '画像の保存に失敗しました'})
-                
-        finally:
-            cap.release()
+        if cv2.imwrite(capture_path, frame):
+            print(f"[SUCCESS] 画像をキャプチャしました: {capture_path}")
+            return jsonify({
+                'success': True, 
+                'message': f'画像をキャプチャしました: {capture_filename}',
+                'filename': capture_filename,
+                'image_path': capture_path
+            })
+        else:
+            return jsonify({'success': False, 'message': '画像の保存に失敗しました'})
             
     except Exception as e:
         print(f"[ERROR] 画像キャプチャエラー: {e}")
@@ -405,14 +678,12 @@ def serve_captured_image(filename):
     try:
         # sample_imgディレクトリから画像を配信
         sample_img_dir = "sample_img"
-        image_path = os.path.join(sample_img_dir, filename)
         
-        if os.path.exists(image_path):
-            with open(image_path, 'rb') as f:
-                image_data = f.read()
-            return Response(image_data, mimetype='image/png')
-        else:
-            print(f"[ERROR] 画像ファイルが見つかりません: {image_path}")
+        try:
+            # ファイルをそのまま送信（sendfileが使え、ETag/Last-Modifiedで304を返せる）
+            return send_from_directory(sample_img_dir, filename, mimetype='image/png', max_age=0)
+        except NotFound:
+            print(f"[ERROR] 画像ファイルが見つかりません: {os.path.join(sample_img_dir, filename)}")
             return jsonify({'error': 'Image not found'}), 404
             
     except Exception as e:
@@ -428,19 +699,12 @@ def settings_page():
 @app.route('/coordinates')
 def coordinates_page():
     """座標設定ページ"""
-    settings = load_settings()
-    main_running = is_main_running()
-    return render_template('coordinates.html', settings=settings, main_running=main_running)
+    return render_cached_page('coordinates.html', load_settings(), is_main_running_cached())
 
 @app.route('/monitoring')
 def monitoring_page():
     """監視状況ページ"""
-    settings = load_settings()
-    main_running = is_main_running()
-    return render_template('monitoring.html', 
-                         settings=settings, 
-                         main_running=main_running,
-                         current_time=datetime.now().strftime('%Y-%m-%d %H:%M:%S'))
+    return render_cached_page('monitoring.html', load_settings(), is_main_running_cached())
 
 @app.route('/api/coordinates', methods=['GET'])
 def get_coordinates_api():
@@ -471,25 +735,15 @@ def save_coordinates_api():
             return jsonify({'success': False, 'message': '座標データが無効です'}), 400
         
         # 必要な座標データが含まれているかチェック
-        required_colors = ['orange', 'green']
-        required_keys = ['x1', 'y1', 'x2', 'y2']
+        error = validate_coordinates_payload(coordinates)
+        if error:
+            return jsonify({'success': False, 'message': error}), 400
         
-        for color in required_colors:
-            if color not in coordinates:
-                return jsonify({'success': False, 'message': f'{color}の座標が見つかりません'}), 400
-            
-            coord_data = coordinates[color]
-            for key in required_keys:
-                if key not in coord_data:
-                    return jsonify({'success': False, 'message': f'{color}の{key}座標が見つかりません'}), 400
-                
-                # 数値かどうかチェック
-                if not isinstance(coord_data[key], (int, float)):
-                    return jsonify({'success': False, 'message': f'{color}の{key}座標が数値ではありません'}), 400
-        
-        # 現在の設定を読み込み
+        # 現在の設定を読み込み（キャッシュされた辞書を書き換えないようコピー）
         settings = load_settings()
-        if not settings:
+        if settings:
+            settings = dict(settings)
+        else:
             # 設定ファイルが存在しない場合、デフォルト設定を作成
             settings = {
                 "detection": {
@@ -516,22 +770,35 @@ def save_coordinates_api():
         print(f"[ERROR] 座標保存API エラー: {e}")
         return jsonify({'success': False, 'message': f'エラー: {str(e)}'}), 500
 
-@app.route('/api/coordinates/start', methods=['POST'])
-def start_coordinate_setter():
-    """座標設定ツールを開始"""
-    try:
+def spawn_coordinate_setter():
+    """main.pyと共有カメラを止めてから座標設定ツールを起動し、プロセスを返す（失敗時は例外）"""
+    with main_process_lock:
         # main.pyが実行中の場合は停止
         if is_main_running():
             stop_main_process()
-            time.sleep(2)
         
-        # 座標設定ツールを開始
+        # 座標設定ツールがカメラを開けるよう共有カメラを解放
+        stop_camera_feed()
+        wait_for_camera_release()
+        
+        # 座標設定ツールを開始（Flaskのソケットなどを引き継がないよう別セッションで起動）
         coord_process = subprocess.Popen(
-            ['python', 'coordinate_setter.py'],
-            stdout=subprocess.PIPE,
-            stderr=subprocess.PIPE,
-            universal_newlines=True
+            [sys.executable, 'coordinate_setter.py'],
+            cwd=APP_DIR,
+            start_new_session=True,
+            close_fds=True,
+            stdout=None,  # 読み手のいないPIPEはバッファが埋まると子プロセスがブロックする
+            stderr=None
         )
+        print(f"[INFO] 座標設定ツールを開始しました (PID: {coord_process.pid})")
+        return coord_process
+
+@app.route('/api/coordinates/start', methods=['POST'])
+def start_coordinate_setter():
+    """座標設定ツールを開始"""
+    try:
+        # Popenは軽いので起動結果を待って返す（カメラの解放待ちは停止直後の場合のみ）
+        coord_process = spawn_coordinate_setter()
         
         return jsonify({
             'success': True, 
@@ -540,76 +807,95 @@ def start_coordinate_setter():
         })
         
     except Exception as e:
+        print(f"[ERROR] 座標設定ツールの開始に失敗: {e}")
         return jsonify({'success': False, 'error': str(e)}), 500
 
 @app.route('/api/coordinates/preview', methods=['GET'])
 def preview_coordinates():
     """現在の座標設定をプレビュー"""
     try:
-        # coordinate_setter.pyのプレビュー機能を使用
-        result = subprocess.run(
-            ['python', 'coordinate_setter.py', '--preview'],
-            capture_output=True,
-            text=True,
-            timeout=10
-        )
+        # coordinate_setter.pyのプレビュー機能をプロセス内で使用
+        # （設定ファイルが読めない場合は座標0のプレビューになる点もcoordinate_setter.pyと同じ）
+        settings = load_settings() or {}
         
-        if result.returncode == 0:
-            return jsonify({
-                'success': True,
-                'output': result.stdout
-            })
-        else:
-            return jsonify({
-                'success': False,
-                'error': result.stderr or 'プレビューの実行に失敗しました'
-            }), 500
+        return jsonify({
+            'success': True,
+            'output': format_coordinates_preview(settings.get('coordinates', {}))
+        })
             
     except Exception as e:
         return jsonify({'success': False, 'error': str(e)}), 500
 
+# 座標プレビューの画質（位置確認用なので90は過剰、setting.jsonのcamera.preview_jpeg_qualityで変更可）
+COORDINATE_PREVIEW_QUALITY = 75
+
 @app.route('/coordinate_preview_feed')
 def coordinate_preview_feed():
     """座標プレビュー用の映像フィード"""
     try:
-        # カメラから1フレーム取得
-        camera_index = find_available_camera()
-        if camera_index is None:
-            error_frame = create_error_frame()
-            _, buffer = cv2.imencode('.jpg', error_frame)
-            return Response(buffer.tobytes(), mimetype='image/jpeg')
+        # 共有カメラから最新フレームを取得
+        frame = get_camera_frame()
+        if frame is None:
+            return Response(ERROR_FRAME_JPEG, mimetype='image/jpeg')
         
-        cap = cv2.VideoCapture(camera_index)
-        if not cap.isOpened():
-            error_frame = create_error_frame()
-            _, buffer = cv2.imencode('.jpg', error_frame)
-            return Response(buffer.tobytes(), mimetype='image/jpeg')
-        
-        # フレームを取得
-        ret, frame = cap.read()
-        cap.release()
+        # 座標プレビューオーバーレイを追加（共有フレームには描き込まないようコピーに描画）
+        frame_with_coordinates = add_coordinate_preview_overlay(frame.copy())
         
-        if not ret:
-            error_frame = create_error_frame()
-            _, buffer = cv2.imencode('.jpg', error_frame)
-            return Response(buffer.tobytes(), mimetype='image/jpeg')
+        quality = (load_settings() or {}).get('camera', {}).get('preview_jpeg_quality', COORDINATE_PREVIEW_QUALITY)
         
-        # 座標プレビューオーバーレイを追加
-        frame_with_coordinates = add_coordinate_preview_overlay(frame)
+        # ?fmt=webp 指定時はWebPで返す（同等画質でJPEGより小さい）
+        if request.args.get('fmt') == 'webp':
+            _, buffer = cv2.imencode('.webp', frame_with_coordinates, [cv2.IMWRITE_WEBP_QUALITY, quality])
+            return Response(buffer.tobytes(), mimetype='image/webp')
         
         # JPEGエンコード
-        _, buffer = cv2.imencode('.jpg', frame_with_coordinates, [cv2.IMWRITE_JPEG_QUALITY, 90])
-        return Response(buffer.tobytes(), mimetype='image/jpeg')
+        return Response(encode_jpeg(frame_with_coordinates, quality=quality), mimetype='image/jpeg')
         
     except Exception as e:
         print(f"[ERROR] 座標プレビューエラー: {e}")
-        error_frame = create_error_frame()
-        _, buffer = cv2.imencode('.jpg', error_frame)
-        return Response(buffer.tobytes(), mimetype='image/jpeg')
+        return Response(ERROR_FRAME_JPEG, mimetype='image/jpeg')
+
+@functools.lru_cache(maxsize=256)
+def get_text_size(text, font_scale, thickness, font=cv2.FONT_HERSHEY_SIMPLEX):
+    """cv2.getTextSizeの結果をキャッシュ（毎フレーム同じ文字列を測り直さない）"""
+    return cv2.getTextSize(text, font, font_scale, thickness)
+
+# ランプごとの枠の色・ラベル・ラベル文字色 (BGR)
+LAMP_BOX_STYLES = {
+    'orange': ((0, 165, 255), "ORANGE LAMP", (255, 255, 255)),  # オレンジ色
+    'green': ((0, 255, 0), "GREEN LAMP", (0, 0, 0)),  # 緑色
+}
+
+def _draw_lamp_box(frame, coords, color_bgr, label, text_color):
+    """ランプの矩形・ラベル・サイズ情報を描画（座標が揃っていなければ何もしない）"""
+    x1, y1, x2, y2 = (coords.get(k) for k in COORDINATE_KEYS)
+    if None in (x1, y1, x2, y2):
+        return
+    
+    font = cv2.FONT_HERSHEY_SIMPLEX
+    cv2.rectangle(frame, (x1, y1), (x2, y2), color_bgr, 3)
+    
+    # ラベル背景
+    (text_width, text_height), baseline = get_text_size(label, 0.6, 2)
+    label_y = max(y1 - 10, text_height + 5)
+    cv2.rectangle(frame, (x1, label_y - text_height - 5), 
+                 (x1 + text_width + 10, label_y + 5), color_bgr, -1)
+    
+    # ラベルテキスト
+    cv2.putText(frame, label, (x1 + 5, label_y), 
+               font, 0.6, text_color, 2)
+    
+    # サイズ情報
+    size_text = f"{x2-x1}x{y2-y1}"
+    cv2.putText(frame, size_text, (x1, y2 + 20), 
+               font, 0.5, color_bgr, 2)
 
 def add_coordinate_preview_overlay(frame):
-    """座標プレビュー用のオーバーレイを追加"""
-    overlay_frame = frame.copy()
+    """座標プレビュー用のオーバーレイを追加
+    
+    frameに直接描画するため、呼び出し側は書き換えてよいフレームを渡すこと
+    """
+    overlay_frame = frame
     settings = load_settings()
     
     if not settings:
@@ -618,64 +904,15 @@ def add_coordinate_preview_overlay(frame):
     # 座標を取得
     coordinates = settings.get('coordinates', {})
     
-    # オレンジランプの座標
-    orange_coords = coordinates.get('orange', {})
-    if all(key in orange_coords for key in ['x1', 'y1', 'x2', 'y2']):
-        x1, y1, x2, y2 = orange_coords['x1'], orange_coords['y1'], orange_coords['x2'], orange_coords['y2']
-        
-        # オレンジ色の矩形を描画
-        cv2.rectangle(overlay_frame, (x1, y1), (x2, y2), (0, 165, 255), 3)  # オレンジ色 (BGR)
-        
-        # ラベルを描画
-        label_text = "ORANGE LAMP"
-        font = cv2.FONT_HERSHEY_SIMPLEX
-        (text_width, text_height), baseline = cv2.getTextSize(label_text, font, 0.6, 2)
-        
-        # ラベル背景
-        label_y = max(y1 - 10, text_height + 5)
-        cv2.rectangle(overlay_frame, (x1, label_y - text_height - 5), 
-                     (x1 + text_width + 10, label_y + 5), (0, 165, 255), -1)
-        
-        # ラベルテキスト
-        cv2.putText(overlay_frame, label_text, (x1 + 5, label_y), 
-                   font, 0.6, (255, 255, 255), 2)
-        
-        # サイズ情報
-        size_text = f"{x2-x1}x{y2-y1}"
-        cv2.putText(overlay_frame, size_text, (x1, y2 + 20), 
-                   font, 0.5, (0, 165, 255), 2)
-    
-    # 緑ランプの座標
-    green_coords = coordinates.get('green', {})
-    if all(key in green_coords for key in ['x1', 'y1', 'x2', 'y2']):
-        x1, y1, x2, y2 = green_coords['x1'], green_coords['y1'], green_coords['x2'], green_coords['y2']
-        
-        # 緑色の矩形を描画
-        cv2.rectangle(overlay_frame, (x1, y1), (x2, y2), (0, 255, 0), 3)  # 緑色 (BGR)
-        
-        # ラベルを描画
-        label_text = "GREEN LAMP"
-        font = cv2.FONT_HERSHEY_SIMPLEX
-        (text_width, text_height), baseline = cv2.getTextSize(label_text, font, 0.6, 2)
-        
-        # ラベル背景
-        label_y = max(y1 - 10, text_height + 5)
-        cv2.rectangle(overlay_frame, (x1, label_y - text_height - 5), 
-                     (x1 + text_width + 10, label_y + 5), (0, 255, 0), -1)
-        
-        # ラベルテキスト
-        cv2.putText(overlay_frame, label_text, (x1 + 5, label_y), 
-                   font, 0.6, (0, 0, 0), 2)
-        
-        # サイズ情報
-        size_text = f"{x2-x1}x{y2-y1}"
-        cv2.putText(overlay_frame, size_text, (x1, y2 + 20), 
-                   font, 0.5, (0, 255, 0), 2)
+    # ランプ枠を描画
+    for color in LAMP_COLORS:
+        color_bgr, label, text_color = LAMP_BOX_STYLES[color]
+        _draw_lamp_box(overlay_frame, coordinates.get(color, {}), color_bgr, label, text_color)
     
     # 全体的な情報を表示
     info_text = "COORDINATE PREVIEW"
     font = cv2.FONT_HERSHEY_SIMPLEX
-    (text_width, text_height), baseline = cv2.getTextSize(info_text, font, 0.8, 2)
+    (text_width, text_height), baseline = get_text_size(info_text, 0.8, 2)
     
     # 情報背景
     cv2.rectangle(overlay_frame, (10, 10), 
@@ -696,8 +933,13 @@ def add_coordinate_preview_overlay(frame):
 # カメラストリーミング機能
 # ========================================
 
-def find_available_camera():
-    """利用可能なカメラデバイスを検索"""
+def find_available_camera(rescan=False):
+    """利用可能なカメラデバイスを検索（見つかった番号は再検索するまで使い回す）"""
+    global camera_index_cache
+    
+    if camera_index_cache is not None and not rescan:
+        return camera_index_cache
+    
     settings = load_settings()
     search_range = settings.get('camera', {}).get('search_range', 5) if settings else 5
     
@@ -706,12 +948,13 @@ def find_available_camera():
     for camera_index in range(search_range):
         print(f"[CAMERA] カメラデバイス {camera_index} をテスト中...")
         try:
-            cap = cv2.VideoCapture(camera_index)
+            cap = open_camera(camera_index)
             if cap.isOpened():
                 ret, frame = cap.read()
                 if ret and frame is not None:
                     print(f"[FOUND] カメラデバイス {camera_index} が利用可能です (解像度: {frame.shape[1]}x{frame.shape[0]})")
                     cap.release()
+                    camera_index_cache = camera_index
                     return camera_index
                 else:
                     print(f"[FAIL] カメラデバイス {camera_index} - フレーム取得失敗")
@@ -722,36 +965,43 @@ def find_available_camera():
             print(f"[ERROR] カメラデバイス {camera_index} - エラー: {e}")
     
     print("[ERROR] 利用可能なカメラデバイスが見つかりません")
+    camera_index_cache = None
     return None
 
+def encode_jpeg(frame, quality=85):
+    """BGRフレームをJPEGバイト列にエンコード（libjpeg-turboがあれば使用）"""
+    if turbo_jpeg is not None:
+        return turbo_jpeg.encode(frame, quality=quality, pixel_format=TJPF_BGR, jpeg_subsample=TJSAMP_420)
+    # ハフマン最適化・プログレッシブは使わない（1パスで済ませる）
+    _, buffer = cv2.imencode('.jpg', frame, [cv2.IMWRITE_JPEG_QUALITY, quality,
+                                             cv2.IMWRITE_JPEG_OPTIMIZE, 0,
+                                             cv2.IMWRITE_JPEG_PROGRESSIVE, 0])
+    return buffer.tobytes()
+
+def mjpeg_part(jpeg):
+    """JPEGバイト列をmultipart/x-mixed-replace（boundary=frame）の1パートにする"""
+    return b'--frame\r\nContent-Type: image/jpeg\r\n\r\n' + jpeg + b'\r\n'
+
+# 配信用JPEGの画質（640px幅の監視映像なので85は過剰、4:2:0サンプリングで十分）
+STREAM_JPEG_QUALITY = 70
+
 def generate_camera_frames():
     """カメラフレームを生成（ストリーミング用）"""
-    global camera_running
-    
     print("[STREAM] カメラストリーミング開始")
-    camera_index = find_available_camera()
-    if camera_index is None:
+    if not start_camera_feed():
         print("[STREAM] カメラが見つからないため、エラーフレームを生成")
-        # エラー用のダミーフレームを生成
-        error_frame = create_error_frame()
-        _, buffer = cv2.imencode('.jpg', error_frame)
-        frame_bytes = buffer.tobytes()
-        
-        while camera_running:
-            yield (b'--frame\r\n'
-                   b'Content-Type: image/jpeg\r\n\r\n' + frame_bytes + b'\r\n')
-            time.sleep(1)
+        # エラー用のダミーフレーム（起動時にエンコード済み）
+        yield mjpeg_part(ERROR_FRAME_JPEG)
         return
     
-    cap = cv2.VideoCapture(camera_index)
-    if not cap.isOpened():
-        print(f"[STREAM] カメラデバイス {camera_index} を開けませんでした")
-        return
+    frame_interval = 1.0 / 30  # 約30FPS
+    next_deadline = time.monotonic()
     
     try:
         while camera_running:
-            ret, frame = cap.read()
-            if not ret:
+            # 共有カメラの最新フレームを取得（カメラは開き直さない）
+            frame = get_camera_frame()
+            if frame is None:
                 break
             
             # フレームサイズを調整（Webページ表示用）
@@ -761,75 +1011,106 @@ def generate_camera_frames():
                 new_width = 640
                 new_height = int(height * scale)
                 frame = cv2.resize(frame, (new_width, new_height))
+            else:
+                # 共有フレームには描き込まないためコピーする
+                frame = frame.copy()
             
             # 現在の検知状態をオーバーレイ
             frame_with_status = add_status_overlay_web(frame)
             
             # JPEGエンコード
-            _, buffer = cv2.imencode('.jpg', frame_with_status, [cv2.IMWRITE_JPEG_QUALITY, 85])
-            frame_bytes = buffer.tobytes()
+            frame_bytes = encode_jpeg(frame_with_status, STREAM_JPEG_QUALITY)
             
             # ストリーミング形式で出力
-            yield (b'--frame\r\n'
-                   b'Content-Type: image/jpeg\r\n\r\n' + frame_bytes + b'\r\n')
+            yield mjpeg_part(frame_bytes)
             
-            time.sleep(0.03)  # 約30FPS
+            # 処理時間を含めて一定間隔になるよう次の送信時刻まで待つ
+            next_deadline += frame_interval
+            delay = next_deadline - time.monotonic()
+            if delay > 0:
+                time.sleep(delay)
+            else:
+                # 遅れている場合は待たずに最新フレームへ追いつく
+                next_deadline = time.monotonic()
             
     except Exception as e:
         print(f"[ERROR] カメラストリーミングエラー: {e}")
-    finally:
-        cap.release()
+
+DETECTION_LOG_TAIL_BYTES = 4096  # 最新ログを探すためにdata.csvの末尾から読むバイト数
+
+@functools.lru_cache(maxsize=1)
+def _load_detection_logs_cached(stamp, count=5):
+    """data.csvの末尾だけを読み、最新の検知ログを返す（(更新時刻ns, サイズ) ごとにキャッシュ）"""
+    with open('data.csv', 'rb') as f:
+        header = f.readline()
+        start = max(f.tell(), stamp[1] - DETECTION_LOG_TAIL_BYTES)
+        f.seek(start)
+        tail = f.read()
+    
+    lines = tail.decode('utf-8', errors='ignore').splitlines()
+    if start > len(header):
+        # 途中から読んだ先頭行は欠けている可能性があるので捨てる
+        lines = lines[1:]
+    
+    fieldnames = next(csv.reader([header.decode('utf-8-sig')]), [])
+    logs = list(csv.DictReader(lines, fieldnames=fieldnames))
+    return logs[-count:]
+
+# data.csvの更新確認はこの間隔に1回だけ行う（毎フレームstatを発行しない）
+DETECTION_LOG_CHECK_SECONDS = 0.5
+detection_log_cache = {'time': None, 'logs': []}
 
 def load_detection_logs():
-    """data.csvから最新の検知ログを読み込み"""
+    """data.csvから最新の検知ログを読み込み（ファイルが更新されていなければキャッシュを返す）"""
+    now = time.monotonic()
+    cached_time = detection_log_cache['time']
+    if cached_time is not None and now - cached_time < DETECTION_LOG_CHECK_SECONDS:
+        return detection_log_cache['logs']
+    
     try:
-        if not os.path.exists('data.csv'):
-            return []
-        
-        import csv
-        logs = []
-        with open('data.csv', 'r', encoding='utf-8') as f:
-            reader = csv.DictReader(f)
-            for row in reader:
-                logs.append(row)
-        
-        # 最新5件を返す
-        return logs[-5:] if logs else []
+        stamp = data_csv_stamp()
+        logs = _load_detection_logs_cached(stamp) if stamp is not None else []
     except Exception as e:
         print(f"[ERROR] ログ読み込みエラー: {e}")
-        return []
+        logs = []
+    
+    detection_log_cache.update(time=now, logs=logs)
+    return logs
 
-def add_status_overlay_web(frame):
-    """Web表示用のステータスオーバーレイを追加（main.pyと同様の表示）"""
-    overlay_frame = frame.copy()
+# 時刻以外のオーバーレイ（タイトル・モード・検知ログ・操作説明）は変化したときだけ描き直す
+status_overlay_cache = {'key': None, 'patches': None}
+
+def draw_text_bg(img, text, pos, font_scale=0.35, color=(255, 255, 255), bg_color=(0, 0, 0), thickness=1):
+    """背景付きテキストを描画"""
+    font = cv2.FONT_HERSHEY_SIMPLEX
+    (text_width, text_height), baseline = get_text_size(text, font_scale, thickness)
+    x, y = pos
+    cv2.rectangle(img, (x - 5, y - text_height - 5), 
+                 (x + text_width + 5, y + baseline + 5), bg_color, -1)
+    cv2.putText(img, text, pos, font, font_scale, color, thickness)
+    return (x - 5, y - text_height - 5, x + text_width + 5, y + baseline + 5)
+
+def render_static_overlay(shape, main_running, detection_logs):
+    """時刻以外のオーバーレイを描画し、背景矩形ごとの画素を切り出す"""
+    sprite = np.zeros(shape, dtype=np.uint8)
+    rects = []
+    
+    def draw(text, pos, **kwargs):
+        rects.append(draw_text_bg(sprite, text, pos, **kwargs))
     
     # main.pyの表示と同様のオーバーレイを作成
     y_offset = 25
     line_height = 20
     
     # タイトル
-    font = cv2.FONT_HERSHEY_SIMPLEX
-    
-    def draw_text_bg(img, text, pos, font_scale=0.35, color=(255, 255, 255), bg_color=(0, 0, 0), thickness=1):
-        (text_width, text_height), baseline = cv2.getTextSize(text, font, font_scale, thickness)
-        x, y = pos
-        cv2.rectangle(img, (x - 5, y - text_height - 5), 
-                     (x + text_width + 5, y + baseline + 5), bg_color, -1)
-        cv2.putText(img, text, pos, font, font_scale, color, thickness)
-    
-    # タイトル
-    draw_text_bg(overlay_frame, "LAMP DETECTION SYSTEM", (20, y_offset), 
-                font_scale=0.5, color=(255, 255, 255), bg_color=(0, 100, 200))
+    draw("LAMP DETECTION SYSTEM", (20, y_offset), 
+         font_scale=0.5, color=(255, 255, 255), bg_color=(0, 100, 200))
     y_offset += line_height + 5
     
-    # 現在時刻
-    time_str = datetime.now().strftime('%Y-%m-%d %H:%M:%S')
-    draw_text_bg(overlay_frame, f"TIME: {time_str}", (20, y_offset), 
-                color=(255, 255, 255), bg_color=(50, 50, 50))
+    # 現在時刻（毎フレーム描画するためここでは位置だけ進める）
     y_offset += line_height
     
     # 実行状態
-    main_running = is_main_running()
     if main_running:
         mode_text = "[WEB MONITORING]"
         mode_color = (0, 255, 255)
@@ -839,113 +1120,282 @@ def add_status_overlay_web(frame):
         mode_color = (255, 255, 255)
         mode_bg = (50, 50, 50)
     
-    draw_text_bg(overlay_frame, mode_text, (20, y_offset), 
-                color=mode_color, bg_color=mode_bg)
+    draw(mode_text, (20, y_offset), color=mode_color, bg_color=mode_bg)
     y_offset += line_height + 5
     
     # 検知ログの表示
-    detection_logs = load_detection_logs()
     if detection_logs:
-        draw_text_bg(overlay_frame, "RECENT DETECTIONS:", (20, y_offset), 
-                    font_scale=0.4, color=(255, 255, 255), bg_color=(100, 100, 0))
+        draw("RECENT DETECTIONS:", (20, y_offset), 
+             font_scale=0.4, color=(255, 255, 255), bg_color=(100, 100, 0))
         y_offset += line_height
         
         for log in detection_logs:
             if log.get('detection_result'):
                 log_text = f"{log['timestamp'][-8:]} - {log['detection_result']}"
                 log_color = (0, 165, 255) if log['detection_result'] == 'オレンジ' else (0, 255, 0)
-                draw_text_bg(overlay_frame, log_text, (30, y_offset), 
-                           font_scale=0.3, color=log_color, bg_color=(30, 30, 30))
+                draw(log_text, (30, y_offset), 
+                     font_scale=0.3, color=log_color, bg_color=(30, 30, 30))
                 y_offset += 15
     
     # 操作説明
     y_offset += 5
-    draw_text_bg(overlay_frame, "Web control available below", (20, y_offset), 
-                font_scale=0.3, color=(255, 255, 255), bg_color=(100, 0, 0))
-    
-    return overlay_frame
+    draw("Web control available below", (20, y_offset), 
+         font_scale=0.3, color=(255, 255, 255), bg_color=(100, 0, 0))
+    
+    # 文字は全て背景矩形の内側にあるので、矩形単位で切り出せばマスクは不要
+    # （矩形同士が重なっていても描画順どおりの画素を切り出すことになる）
+    height, width = shape[:2]
+    patches = []
+    for x1, y1, x2, y2 in rects:
+        rows = slice(max(y1, 0), min(y2 + 1, height))
+        cols = slice(max(x1, 0), min(x2 + 1, width))
+        patches.append((rows, cols, sprite[rows, cols].copy()))
+    return patches
 
-def create_error_frame():
-    """カメラエラー時のダミーフレームを作成"""
-    # 640x480の黒いフレームを作成
-    frame = np.zeros((480, 640, 3), dtype=np.uint8)
+def add_status_overlay_web(frame):
+    """Web表示用のステータスオーバーレイを追加（main.pyと同様の表示）
     
-    # エラーメッセージを描画
-    font = cv2.FONT_HERSHEY_SIMPLEX
+    frameに直接描画するため、呼び出し側は書き換えてよいフレームを渡すこと
+    """
+    main_running = is_main_running_cached()
+    detection_logs = load_detection_logs()
+    key = (frame.shape, main_running,
+           tuple((log.get('timestamp'), log.get('detection_result')) for log in detection_logs))
     
-    # 背景矩形
-    cv2.rectangle(frame, (50, 200), (590, 280), (50, 50, 50), -1)
+    if status_overlay_cache['key'] != key:
+        patches = render_static_overlay(frame.shape, main_running, detection_logs)
+        status_overlay_cache.update(key=key, patches=patches)
     
-    # エラーテキスト
-    error_texts = [
-        "Camera Not Available",
-        "Please check camera connection",
-        "or try restarting the system"
-    ]
+    # 現在時刻（実行状態の背景と重なるため先に描画する）
+    time_str = datetime.now().strftime('%Y-%m-%d %H:%M:%S')
+    draw_text_bg(frame, f"TIME: {time_str}", (20, 50), 
+                color=(255, 255, 255), bg_color=(50, 50, 50))
     
-    y_offset = 230
-    for text in error_texts:
-        (text_width, _), _ = cv2.getTextSize(text, font, 0.8, 2)
-        x_offset = (640 - text_width) // 2
-        cv2.putText(frame, text, (x_offset, y_offset), font, 0.8, (0, 0, 255), 2)
-        y_offset += 30
+    # 静的部分を合成
+    for rows, cols, patch in status_overlay_cache['patches']:
+        frame[rows, cols] = patch
     
     return frame
 
-def check_camera_conflicts():
-    """カメラの競合状態をチェック"""
-    conflicts = []
-    
-    # main.pyプロセスがカメラを使用中かチェック
-    if is_main_running():
-        conflicts.append("main.pyがカメラを使用中の可能性があります")
+# 他のOpenCVプロセスの検索結果（全プロセスの走査は重いので一定時間使い回す）
+opencv_process_cache = {'time': None, 'pids': []}
+OPENCV_PROCESS_CACHE_SECONDS = 10
+
+def find_other_opencv_processes():
+    """自分以外でOpenCVを使っていそうなPythonプロセスのPIDを取得"""
+    now = time.monotonic()
+    if opencv_process_cache['time'] is not None and now - opencv_process_cache['time'] < OPENCV_PROCESS_CACHE_SECONDS:
+        return opencv_process_cache['pids']
     
-    # 他のOpenCVプロセスをチェック
+    pids = []
     try:
         import psutil
-        for proc in psutil.process_iter(['pid', 'name', 'cmdline']):
+        # コマンドラインの取得は重いので、プロセス名がpythonのものだけ調べる
+        for proc in psutil.process_iter(['pid', 'name']):
             try:
-                if proc.info['cmdline']:
-                    cmdline = ' '.join(proc.info['cmdline'])
-                    if ('python' in cmdline.lower() and 
-                        ('cv2' in cmdline or 'opencv' in cmdline) and 
-                        proc.info['pid'] != os.getpid()):
-                        conflicts.append(f"他のOpenCVプロセスが実行中: PID {proc.info['pid']}")
+                if 'python' not in (proc.info['name'] or '').lower() or proc.info['pid'] == os.getpid():
+                    continue
+                cmdline = ' '.join(proc.cmdline())
+                if 'cv2' in cmdline or 'opencv' in cmdline:
+                    pids.append(proc.info['pid'])
             except (psutil.NoSuchProcess, psutil.AccessDenied):
                 continue
     except ImportError:
         pass
     
+    opencv_process_cache.update(time=now, pids=pids)
+    return pids
+
+def check_camera_conflicts():
+    """カメラの競合状態をチェック"""
+    conflicts = []
+    
+    # main.pyプロセスがカメラを使用中かチェック
+    if is_main_running_cached():
+        conflicts.append("main.pyがカメラを使用中の可能性があります")
+    
+    # 他のOpenCVプロセスをチェック
+    for pid in find_other_opencv_processes():
+        conflicts.append(f"他のOpenCVプロセスが実行中: PID {pid}")
+    
     return conflicts
 
-def start_camera_feed():
-    """カメラフィードを開始"""
-    global camera_running, camera_thread
+def open_camera(camera_index):
+    """カメラデバイスを開く（内部バッファは1フレームに制限）"""
+    if os.name == 'nt':
+        cap = cv2.VideoCapture(camera_index, cv2.CAP_DSHOW)  # WindowsではDirectShowを使用
+    else:
+        cap = cv2.VideoCapture(camera_index)
     
-    if camera_running:
-        return True
+    # USB帯域を抑えるためカメラ側でMJPG圧縮したストリームを要求する（非対応のカメラでは無視される）
+    cap.set(cv2.CAP_PROP_FOURCC, cv2.VideoWriter_fourcc(*'MJPG'))
+    # 設定の解像度で取り込む（Web表示用の縮小を不要にする。座標はこの解像度が基準）
+    settings = load_settings()
+    camera_settings = settings.get('camera', {}) if settings else {}
+    cap.set(cv2.CAP_PROP_FRAME_WIDTH, camera_settings.get('capture_width', 640))
+    cap.set(cv2.CAP_PROP_FRAME_HEIGHT, camera_settings.get('capture_height', 480))
+    # 古いフレームが溜まって遅延が増えないようにする
+    cap.set(cv2.CAP_PROP_BUFFERSIZE, 1)
+    return cap
+
+# この時間フレームが要求されなければ共有カメラを解放する（他のプログラムがカメラを開けるように）
+CAMERA_IDLE_RELEASE_SECONDS = 5
+
+def camera_capture_loop(cap):
+    """共有カメラからフレームを読み続け、最新フレームを保持する
+    
+    CAMERA_IDLE_RELEASE_SECONDS の間フレームが要求されなければ終了してカメラを解放する
+    （次の要求で get_camera_frame() が開き直す）
+    """
+    global camera_running, camera_released_at
+    
+    try:
+        while camera_running and camera_feed is cap:
+            if time.monotonic() - camera_last_requested > CAMERA_IDLE_RELEASE_SECONDS:
+                print("[CAMERA] 共有カメラが使われていないため解放します")
+                break
+            
+            # grab()だけならデコードしないので、ドライバのバッファを新しく保つために毎回呼ぶ
+            if not cap.grab():
+                print("[CAMERA] フレームを取得できませんでした。共有カメラを停止します")
+                break
+            
+            # デコード（retrieve）はフレームを要求されているときだけ行う
+            if not camera_frame_wanted.is_set() and camera_frames:
+                continue
+            camera_frame_wanted.clear()
+            
+            ret, frame = cap.retrieve()
+            if not ret:
+                print("[CAMERA] フレームを取得できませんでした。共有カメラを停止します")
+                break
+            
+            camera_frames.append((time.monotonic(), frame))
+            camera_frame_ready.set()
+    finally:
+        cap.release()
+        camera_released_at = time.monotonic()
+        # 停止後に別のフィードが開始されていれば、そちらの状態は変えない
+        if camera_feed is cap:
+            camera_running = False
+            camera_frame_ready.set()  # 待機中の呼び出し元を起こす
+
+def start_camera_feed():
+    """カメラフィードを開始（1つのVideoCaptureを各機能で共有）"""
+    global camera_running, camera_thread, camera_feed, camera_index_cache, camera_last_requested
     
-    camera_running = True
-    camera_thread = threading.Thread(target=lambda: None)  # ダミー
-    camera_thread.start()
+    # 複数のリクエストから同時に呼ばれてもカメラを二重に開かない
+    with camera_lock:
+        if camera_running:
+            return True
+        
+        camera_index = find_available_camera()
+        if camera_index is None:
+            return False
+        
+        cap = open_camera(camera_index)
+        if not cap.isOpened():
+            print(f"[CAMERA] カメラデバイス {camera_index} を開けませんでした。検索し直します")
+            # 接続が変わった可能性があるため、キャッシュを捨ててもう一度だけ検索する
+            camera_index = find_available_camera(rescan=True)
+            if camera_index is None:
+                return False
+            cap = open_camera(camera_index)
+            if not cap.isOpened():
+                print(f"[CAMERA] カメラデバイス {camera_index} を開けませんでした")
+                camera_index_cache = None
+                return False
+        
+        camera_feed = cap
+        camera_frames.clear()
+        camera_frame_ready.clear()
+        camera_last_requested = time.monotonic()  # 開いた直後に未使用として解放しない
+        camera_running = True
+        camera_thread = threading.Thread(target=camera_capture_loop, args=(cap,), daemon=True)
+        camera_thread.start()
     
     return True
 
 def stop_camera_feed():
     """カメラフィードを停止"""
-    global camera_running, camera_thread
-    
-    camera_running = False
-    if camera_thread and camera_thread.is_alive():
-        camera_thread.join(timeout=2)
+    global camera_running, camera_thread, camera_feed
     
+    with camera_lock:
+        camera_running = False
+        if camera_thread and camera_thread.is_alive():
+            camera_thread.join(timeout=2)
+        
+        camera_thread = None
+        camera_feed = None
+        camera_frames.clear()
+        camera_frame_ready.clear()
     return True
 
+def get_camera_frame(timeout=2.0, max_age=0.1):
+    """共有カメラの最新フレームを取得（未起動なら起動する）
+    
+    取得からmax_age秒以上経ったフレームは返さず、新しいフレームのデコードを待つ。
+    返すフレームは他の機能と共有しているため、書き換える場合はコピーすること
+    """
+    global camera_last_requested
+    
+    camera_last_requested = time.monotonic()
+    if not camera_running and not start_camera_feed():
+        return None
+    
+    deadline = time.monotonic() + timeout
+    reopened = False
+    while True:
+        if not camera_running:
+            # 読み取り失敗でフィードが止まった場合（stop_camera_feedではcamera_feedがNoneになる）は一度だけ開き直す
+            if reopened or camera_feed is None:
+                return None
+            print("[CAMERA] 共有カメラを開き直します")
+            reopened = True
+            if not start_camera_feed():
+                return None
+        
+        try:
+            captured_at, frame = camera_frames[-1]
+            if time.monotonic() - captured_at <= max_age:
+                camera_frame_wanted.set()  # 次のフレームもデコードしておく
+                return frame
+        except IndexError:
+            pass
+        
+        # 新しいフレームを要求して待つ（要求と通知が行き違っても短い間隔で確認し直す）
+        camera_frame_ready.clear()
+        camera_frame_wanted.set()
+        remaining = deadline - time.monotonic()
+        if remaining <= 0:
+            print("[CAMERA] フレームの取得がタイムアウトしました")
+            return None
+        camera_frame_ready.wait(min(remaining, 0.1))
+
+@functools.lru_cache(maxsize=1)
+def _read_streaming_frame(path, stamp):
+    """main.pyが書き出した配信用フレームを読み込む（(更新時刻ns, サイズ) ごとにキャッシュ）"""
+    with open(path, 'rb') as f:
+        return f.read()
+
+def streaming_frame_response(path, stat):
+    """配信用フレームのレスポンスを作成（statは呼び出し側で取得済みのos.stat結果）
+    
+    更新されるまでは全ての閲覧者で同じバイト列を使い、ETag/Last-Modifiedで
+    ブラウザが持っている画像と同じなら304を返す
+    """
+    stamp = (stat.st_mtime_ns, stat.st_size)
+    response = Response(_read_streaming_frame(path, stamp), mimetype='image/jpeg')
+    response.set_etag(f"{stamp[0]:x}-{stamp[1]:x}")
+    response.last_modified = stat.st_mtime
+    response.cache_control.no_cache = True  # 毎回再検証させる
+    return response.make_conditional(request)
+
 @app.route('/video_feed')
 def video_feed():
     """画像ファイルベースの映像フィード"""
     # main.pyが実行中の場合のみ画像を提供
-    if not is_main_running():
+    if not is_main_running_cached():
         print("[STREAM] main.pyが停止中のため、映像を提供しません")
         return Response("", mimetype='text/plain')
     
@@ -953,35 +1403,25 @@ def video_feed():
     try:
         current_frame_path = os.path.join("streaming", "current_frame.jpg")
         
-        if os.path.exists(current_frame_path):
-            # ファイルの更新時刻をチェック
-            file_time = os.path.getmtime(current_frame_path)
-            current_time = time.time()
-            
-            # 5分以上古い場合は「接続なし」画像を表示
-            if current_time - file_time > 300:  # 5分
-                print(f"[STREAM] フレームが古すぎます ({current_time - file_time:.1f}秒前)")
-                error_frame = create_no_connection_frame()
-                _, buffer = cv2.imencode('.jpg', error_frame)
-                return Response(buffer.tobytes(), mimetype='image/jpeg')
-            
-            # 画像ファイルを読み込んで返す
-            with open(current_frame_path, 'rb') as f:
-                image_data = f.read()
-            
-            return Response(image_data, mimetype='image/jpeg')
-        else:
+        try:
+            stat = os.stat(current_frame_path)
+        except FileNotFoundError:
             print("[STREAM] current_frame.jpgが見つかりません")
-            # 「待機中」画像を生成
-            waiting_frame = create_waiting_frame()
-            _, buffer = cv2.imencode('.jpg', waiting_frame)
-            return Response(buffer.tobytes(), mimetype='image/jpeg')
+            # 「待機中」画像を返す
+            return Response(WAITING_FRAME_JPEG, mimetype='image/jpeg')
+        
+        # 5分以上古い場合は「接続なし」画像を表示
+        age = time.time() - stat.st_mtime
+        if age > 300:  # 5分
+            print(f"[STREAM] フレームが古すぎます ({age:.1f}秒前)")
+            return Response(NO_CONNECTION_FRAME_JPEG, mimetype='image/jpeg')
+        
+        # 画像ファイルを読み込んで返す
+        return streaming_frame_response(current_frame_path, stat)
             
     except Exception as e:
         print(f"[ERROR] 映像フィード エラー: {e}")
-        error_frame = create_error_frame()
-        _, buffer = cv2.imencode('.jpg', error_frame)
-        return Response(buffer.tobytes(), mimetype='image/jpeg')
+        return Response(ERROR_FRAME_JPEG, mimetype='image/jpeg')
 
 def create_waiting_frame():
     """待機中フレームを作成"""
@@ -1000,7 +1440,7 @@ def create_waiting_frame():
     
     y_offset = 230
     for text in waiting_texts:
-        (text_width, _), _ = cv2.getTextSize(text, font, 0.8, 2)
+        (text_width, _), _ = get_text_size(text, 0.8, 2)
         x_offset = (640 - text_width) // 2
         cv2.putText(frame, text, (x_offset, y_offset), font, 0.8, (255, 255, 255), 2)
         y_offset += 30
@@ -1024,7 +1464,7 @@ def create_no_connection_frame():
     
     y_offset = 230
     for text in no_conn_texts:
-        (text_width, _), _ = cv2.getTextSize(text, font, 0.8, 2)
+        (text_width, _), _ = get_text_size(text, 0.8, 2)
         x_offset = (640 - text_width) // 2
         cv2.putText(frame, text, (x_offset, y_offset), font, 0.8, (255, 255, 0), 2)
         y_offset += 30
@@ -1048,19 +1488,26 @@ def create_error_frame():
     
     y_offset = 230
     for text in error_texts:
-        (text_width, _), _ = cv2.getTextSize(text, font, 0.8, 2)
+        (text_width, _), _ = get_text_size(text, 0.8, 2)
         x_offset = (640 - text_width) // 2
         cv2.putText(frame, text, (x_offset, y_offset), font, 0.8, (0, 0, 255), 2)
         y_offset += 30
     
     return frame
 
+# 内容が変わらないプレースホルダー画像は起動時に一度だけJPEG化しておく
+# 文字と単色の背景だけなので画質70で十分（既定の95の約半分のサイズ）
+PLACEHOLDER_JPEG_QUALITY = 70
+ERROR_FRAME_JPEG = encode_jpeg(create_error_frame(), quality=PLACEHOLDER_JPEG_QUALITY)
+WAITING_FRAME_JPEG = encode_jpeg(create_waiting_frame(), quality=PLACEHOLDER_JPEG_QUALITY)
+NO_CONNECTION_FRAME_JPEG = encode_jpeg(create_no_connection_frame(), quality=PLACEHOLDER_JPEG_QUALITY)
+
 @app.route('/api/camera/debug', methods=['GET'])
 def camera_debug():
     """カメラデバッグ情報を取得"""
     try:
         debug_info = {
-            'main_running': is_main_running(),
+            'main_running': is_main_running_cached(),
             'camera_running': camera_running,
             'available_camera': find_available_camera(),
             'conflicts': check_camera_conflicts(),
@@ -1071,6 +1518,21 @@ def camera_debug():
     except Exception as e:
         return jsonify({'success': False, 'error': str(e)}), 500
 
+@app.route('/api/camera/rescan', methods=['POST'])
+def rescan_camera_api():
+    """カメラデバイスを検索し直すAPI（カメラを差し替えたとき用）"""
+    try:
+        if camera_running:
+            return jsonify({'success': False, 'error': 'カメラフィードの停止後に再検索してください'}), 400
+        
+        camera_index = find_available_camera(rescan=True)
+        if camera_index is not None:
+            return jsonify({'success': True, 'camera_index': camera_index})
+        else:
+            return jsonify({'success': False, 'error': '利用可能なカメラデバイスが見つかりません'}), 404
+    except Exception as e:
+        return jsonify({'success': False, 'error': str(e)}), 500
+
 @app.route('/api/camera/start', methods=['POST'])
 def start_camera_api():
     """カメラフィードを開始するAPI"""
@@ -1099,40 +1561,75 @@ def stop_camera_api():
 # オレンジ継続時間分析機能
 # ========================================
 
+def data_csv_stamp():
+    """data.csvの (更新時刻ns, サイズ) を返す（ファイルがなければNone）"""
+    try:
+        stat = os.stat('data.csv')
+    except FileNotFoundError:
+        return None
+    return (stat.st_mtime_ns, stat.st_size)
+
+@functools.lru_cache(maxsize=1)
+def _load_orange_durations_cached(stamp):
+    """data.csv全体からオレンジ継続時間を集める（(更新時刻ns, サイズ) ごとにキャッシュ）"""
+    durations = []
+    with open('data.csv', 'r', encoding='utf-8') as f:
+        reader = csv.DictReader(f)
+        for row in reader:
+            # デバッグモードのデータは無視し、通常モードのみを対象とする
+            if (row['event_type'] == 'orange_end' and 
+                float(row['duration_seconds']) > 0 and 
+                row['debug_mode'] == 'normal'):
+                durations.append({
+                    'timestamp': row['timestamp'],
+                    'duration': float(row['duration_seconds']),
+                    'mode': row['debug_mode'],
+                    'orange_percentage': float(row['orange_percentage']),
+                    'green_percentage': float(row['green_percentage'])
+                })
+    return durations
+
 def load_orange_durations():
-    """data.csvからオレンジ継続時間データを読み込む"""
-    csv_file = "data.csv"
+    """data.csvからオレンジ継続時間データを読み込む（ファイルが更新されていなければキャッシュを返す）
     
-    if not os.path.exists(csv_file):
+    返すリストは共有のキャッシュなので書き換えないこと
+    """
+    stamp = data_csv_stamp()
+    if stamp is None:
         return []
     
     try:
-        durations = []
-        with open(csv_file, 'r', encoding='utf-8') as f:
-            reader = csv.DictReader(f)
-            for row in reader:
-                # デバッグモードのデータは無視し、通常モードのみを対象とする
-                if (row['event_type'] == 'orange_end' and 
-                    float(row['duration_seconds']) > 0 and 
-                    row['debug_mode'] == 'normal'):
-                    durations.append({
-                        'timestamp': row['timestamp'],
-                        'duration': float(row['duration_seconds']),
-                        'mode': row['debug_mode'],
-                        'orange_percentage': float(row['orange_percentage']),
-                        'green_percentage': float(row['green_percentage'])
-                    })
-        return durations
+        return _load_orange_durations_cached(stamp)
     except Exception as e:
         print(f"❌ データ読み込みエラー: {e}")
         return []
 
+@functools.lru_cache(maxsize=1)
+def get_pyplot():
+    """matplotlibを初回のグラフ生成時に読み込む（起動時間とメモリを節約）
+    
+    Returns:
+        tuple: (matplotlib.pyplot, matplotlib.dates)
+    """
+    import matplotlib
+    matplotlib.use('Agg')  # GUI不要のバックエンドを使用
+    import matplotlib.pyplot as plt
+    import matplotlib.dates as mdates
+    
+    # matplotlib の設定
+    matplotlib.rcParams['axes.formatter.limits'] = [-5, 6]
+    matplotlib.rcParams['axes.formatter.use_mathtext'] = True
+    # 図の最大数制限（警告を防ぐ）
+    matplotlib.rcParams['figure.max_open_warning'] = 50
+    return plt, mdates
+
 def generate_duration_chart(durations):
     """継続時間の折れ線グラフを生成"""
     if not durations:
         return None
     
     print(f"[DEBUG] 継続時間グラフ: {len(durations)}件のデータを処理中")
+    plt, mdates = get_pyplot()
     
     # 日本語フォント設定（matplotlib用）
     plt.rcParams['font.family'] = 'DejaVu Sans'
@@ -1238,128 +1735,117 @@ def calculate_statistics(durations):
     
     return stats
 
+@functools.lru_cache(maxsize=1)
+def _load_all_detection_data_cached(stamp):
+    """data.csv全体を読み込む（(更新時刻ns, サイズ) ごとにキャッシュ）"""
+    all_data = []
+    with open('data.csv', 'r', encoding='utf-8') as f:
+        reader = csv.DictReader(f)
+        for row in reader:
+            # 通常モードのデータのみを対象とする（デバッグデータは除外）
+            if row['debug_mode'] == 'normal':
+                all_data.append({
+                    'timestamp': row['timestamp'],
+                    'event_type': row['event_type'],
+                    'detection_result': row['detection_result'],
+                    'orange_percentage': float(row['orange_percentage']) if row['orange_percentage'] else 0,
+                    'green_percentage': float(row['green_percentage']) if row['green_percentage'] else 0,
+                    'duration_seconds': float(row['duration_seconds']) if row['duration_seconds'] else 0,
+                    'image_file': row.get('image_file', '')
+                })
+    return all_data
+
 def load_all_detection_data():
-    """data.csvから全ての検知データを時系列で読み込む"""
-    csv_file = "data.csv"
+    """data.csvから全ての検知データを時系列で読み込む（ファイルが更新されていなければキャッシュを返す）
     
-    if not os.path.exists(csv_file):
+    返すリストは共有のキャッシュなので書き換えないこと
+    """
+    stamp = data_csv_stamp()
+    if stamp is None:
         return []
     
     try:
-        all_data = []
-        with open(csv_file, 'r', encoding='utf-8') as f:
-            reader = csv.DictReader(f)
-            for row in reader:
-                # 通常モードのデータのみを対象とする（デバッグデータは除外）
-                if row['debug_mode'] == 'normal':
-                    all_data.append({
-                        'timestamp': row['timestamp'],
-                        'event_type': row['event_type'],
-                        'detection_result': row['detection_result'],
-                        'orange_percentage': float(row['orange_percentage']) if row['orange_percentage'] else 0,
-                        'green_percentage': float(row['green_percentage']) if row['green_percentage'] else 0,
-                        'duration_seconds': float(row['duration_seconds']) if row['duration_seconds'] else 0,
-                        'image_file': row.get('image_file', '')
-                    })
-        return all_data
+        return _load_all_detection_data_cached(stamp)
     except Exception as e:
         print(f"❌ 全データ読み込みエラー: {e}")
         return []
 
+# ガントチャートの状態ごとの色と透明度
+GANTT_STATE_STYLES = {
+    'オレンジ': ('#FF8C00', 0.8),
+    '緑': ('#32CD32', 0.8),
+    '不明': ('#808080', 0.5),
+}
+
 def generate_gantt_chart(all_data, hours=24):
     """ガントチャート風のタイムライングラフを生成"""
     if not all_data:
         return None
     
+    plt, mdates = get_pyplot()
+    
     # 日本語フォント設定
     plt.rcParams['font.family'] = 'DejaVu Sans'
     
     # 最新データから指定時間分のデータを抽出
-    if all_data:
-        latest_time = datetime.strptime(all_data[-1]['timestamp'], '%Y-%m-%d %H:%M:%S')
-        start_time = latest_time - timedelta(hours=hours)
-        
-        # 指定時間範囲内のデータをフィルタ
-        filtered_data = []
-        for data in all_data:
-            data_time = datetime.strptime(data['timestamp'], '%Y-%m-%d %H:%M:%S')
-            if data_time >= start_time:
-                filtered_data.append(data)
-    else:
-        filtered_data = all_data
+    # タイムスタンプの解析は1行1回のみ（strptimeより高速なfromisoformatを使用）
+    latest_time = datetime.fromisoformat(all_data[-1]['timestamp'])
+    start_time = latest_time - timedelta(hours=hours)
     
-    if not filtered_data:
+    filtered_points = []
+    for data in all_data:
+        data_time = datetime.fromisoformat(data['timestamp'])
+        if data_time >= start_time:
+            filtered_points.append((data_time, data['detection_result']))
+    
+    if not filtered_points:
         return None
     
     # 図を作成
     fig, ax = plt.subplots(1, 1, figsize=(14, 8))
     fig.suptitle(f'Lamp Detection Timeline (Last {hours} Hours)', fontsize=16, fontweight='bold')
     
-    # 時系列データを処理してガントチャート用に変換
+    # 時系列データを処理してガントチャート用に変換（状態が変化した点で区切る）
     timeline_data = []
     current_state = None
     state_start = None
     
-    for i, data in enumerate(filtered_data):
-        timestamp = datetime.strptime(data['timestamp'], '%Y-%m-%d %H:%M:%S')
-        detection = data['detection_result']
-        
-        # 状態変化を検出
+    for timestamp, detection in filtered_points:
         if detection != current_state:
-            # 前の状態を終了
-            if current_state is not None and state_start is not None:
-                timeline_data.append({
-                    'start': state_start,
-                    'end': timestamp,
-                    'state': current_state,
-                    'duration': (timestamp - state_start).total_seconds() / 60  # 分単位
-                })
-            
-            # 新しい状態を開始
+            if current_state is not None:
+                timeline_data.append((state_start, timestamp, current_state))
             current_state = detection
             state_start = timestamp
-        
-        # 最後のデータの場合は現在時刻まで延長
-        if i == len(filtered_data) - 1:
-            end_time = timestamp + timedelta(minutes=1)  # 1分間延長
-            if current_state is not None and state_start is not None:
-                timeline_data.append({
-                    'start': state_start,
-                    'end': end_time,
-                    'state': current_state,
-                    'duration': (end_time - state_start).total_seconds() / 60
-                })
+    
+    # 最後の区間は最終データから1分間延長
+    timeline_data.append((state_start, filtered_points[-1][0] + timedelta(minutes=1), current_state))
     
     # ガントチャートを描画
     y_pos = 0.5
     bar_height = 0.4
     
-    for segment in timeline_data:
-        start_time = segment['start']
-        duration_hours = segment['duration'] / 60  # 時間単位に変換
-        
-        # 色の設定
-        if segment['state'] == 'オレンジ':
-            color = '#FF8C00'  # オレンジ色
-            alpha = 0.8
-        elif segment['state'] == '緑':
-            color = '#32CD32'  # 緑色
-            alpha = 0.8
-        else:  # 不明
-            color = '#808080'  # グレー
-            alpha = 0.5
-        
-        # バーを描画
-        ax.barh(y_pos, duration_hours, left=start_time, height=bar_height, 
-                color=color, alpha=alpha, edgecolor='black', linewidth=0.5)
+    # 状態ごとに区間をまとめ、broken_barhで1回ずつ描画（区間ごとのbarh呼び出しを避ける）
+    ranges_by_state = {}
+    for segment_start, segment_end, state in timeline_data:
+        duration_minutes = (segment_end - segment_start).total_seconds() / 60
+        # X軸は日付単位のため、幅も日数で指定
+        ranges_by_state.setdefault(state, []).append(
+            (mdates.date2num(segment_start), duration_minutes / (24 * 60))
+        )
         
         # 長い区間にはラベルを追加
-        if duration_hours > 0.5:  # 30分以上の場合
-            label_x = start_time + timedelta(hours=duration_hours/2)
-            label_text = f"{segment['state']}\n{segment['duration']:.1f}min"
+        if duration_minutes > 30:  # 30分以上の場合
+            label_x = segment_start + (segment_end - segment_start) / 2
+            label_text = f"{state}\n{duration_minutes:.1f}min"
             ax.text(label_x, y_pos, label_text, ha='center', va='center', 
                    fontsize=8, fontweight='bold', color='white')
     
+    for state, ranges in ranges_by_state.items():
+        color, alpha = GANTT_STATE_STYLES.get(state, GANTT_STATE_STYLES['不明'])
+        ax.broken_barh(ranges, (y_pos - bar_height / 2, bar_height),
+                       facecolors=color, alpha=alpha, edgecolor='black', linewidth=0.5)
+    ax.xaxis_date()
+    
     # 軸の設定
     ax.set_ylim(0, 1)
     ax.set_ylabel('Detection State', fontsize=12)
@@ -1395,9 +1881,8 @@ def generate_gantt_chart(all_data, hours=24):
     # 凡例を追加
     from matplotlib.patches import Patch
     legend_elements = [
-        Patch(facecolor='#FF8C00', alpha=0.8, label='オレンジ'),
-        Patch(facecolor='#32CD32', alpha=0.8, label='緑'),
-        Patch(facecolor='#808080', alpha=0.5, label='不明')
+        Patch(facecolor=color, alpha=alpha, label=state)
+        for state, (color, alpha) in GANTT_STATE_STYLES.items()
     ]
     ax.legend(handles=legend_elements, loc='upper right')
     
@@ -1416,6 +1901,36 @@ def generate_gantt_chart(all_data, hours=24):
     
     return chart_data
 
+# pyplotのグローバル状態はスレッドセーフではないため、グラフ描画は1スレッドずつ行う
+# （待っていたスレッドは描画済みのキャッシュを受け取るので、同じグラフを重複して描画しない）
+chart_lock = threading.Lock()
+
+@functools.lru_cache(maxsize=1)
+def _duration_chart_cached(stamp):
+    """継続時間グラフのPNG(base64)を (更新時刻ns, サイズ) ごとにキャッシュ"""
+    return generate_duration_chart(_load_orange_durations_cached(stamp))
+
+@functools.lru_cache(maxsize=8)
+def _gantt_chart_cached(stamp, hours):
+    """ガントチャートのPNG(base64)を (更新時刻ns, サイズ, 時間範囲) ごとにキャッシュ"""
+    return generate_gantt_chart(_load_all_detection_data_cached(stamp), hours=hours)
+
+def get_duration_chart_data():
+    """継続時間グラフを取得（data.csvが更新されていなければ描画済みの画像を返す）"""
+    stamp = data_csv_stamp()
+    if stamp is None:
+        return None
+    with chart_lock:
+        return _duration_chart_cached(stamp)
+
+def get_gantt_chart_data(hours=24):
+    """ガントチャートを取得（data.csvが更新されていなければ描画済みの画像を返す）"""
+    stamp = data_csv_stamp()
+    if stamp is None:
+        return None
+    with chart_lock:
+        return _gantt_chart_cached(stamp, hours)
+
 @app.route('/analysis')
 def analysis_page():
     """オレンジ継続時間分析ページ"""
@@ -1440,7 +1955,7 @@ def analysis_page():
         if durations:
             print(f"[DEBUG] 継続時間グラフ生成開始")
             try:
-                chart_data = generate_duration_chart(durations)
+                chart_data = get_duration_chart_data()
                 print(f"[DEBUG] 継続時間グラフ生成完了")
             except Exception as chart_error:
                 print(f"[ERROR] 継続時間グラフエラー: {chart_error}")
@@ -1452,7 +1967,7 @@ def analysis_page():
         if all_data:
             print(f"[DEBUG] ガントチャート生成開始")
             try:
-                gantt_chart_data = generate_gantt_chart(all_data, hours=24)
+                gantt_chart_data = get_gantt_chart_data(hours=24)
                 print(f"[DEBUG] ガントチャート生成完了")
             except Exception as gantt_error:
                 print(f"[ERROR] ガントチャートエラー: {gantt_error}")
@@ -1506,7 +2021,7 @@ def get_analysis_chart():
         if not durations:
             return jsonify({'success': False, 'error': 'データが見つかりません'}), 404
         
-        chart_data = generate_duration_chart(durations)
+        chart_data = get_duration_chart_data()
         
         if chart_data:
             return jsonify({'success': True, 'chart_data': chart_data})
@@ -1529,7 +2044,7 @@ def get_gantt_chart():
         if not all_data:
             return jsonify({'success': False, 'error': 'データが見つかりません'}), 404
         
-        gantt_chart_data = generate_gantt_chart(all_data, hours=hours)
+        gantt_chart_data = get_gantt_chart_data(hours=hours)
         
         if gantt_chart_data:
             return jsonify({'success': True, 'gantt_chart_data': gantt_chart_data})
@@ -1543,6 +2058,11 @@ def get_gantt_chart():
 # アプリケーション開始
 # ========================================
 
+# waitressのワーカースレッド数
+# 状態通知（SSE）は開いている全ページで1本、監視ページは画像ストリームと合わせて2本のスレッドを
+# 接続中（最大300秒）使い続けるため、監視ページ12タブ分（24本）に通常のリクエスト用の8本を加えた数にする
+WAITRESS_THREADS = 32
+
 def cleanup_on_exit():
     """終了時のクリーンアップ"""
     global main_process, camera_running
@@ -1568,7 +2088,18 @@ if __name__ == '__main__':
     atexit.register(cleanup_on_exit)
     
     try:
-        app.run(host='0.0.0.0', port=5000, debug=False, threaded=True)
+        try:
+            # 本番用WSGIサーバー（未インストールならFlaskの開発サーバーを使用）
+            # カメラやmain.pyのプロセスをグローバル変数で共有しているため、複数プロセスではなくスレッドで並列処理する
+            from waitress import serve
+        except ImportError:
+            serve = None
+        
+        if serve is not None:
+            print("[INFO] waitressでWebサーバーを起動します")
+            serve(app, host='0.0.0.0', port=5000, threads=WAITRESS_THREADS)
+        else:
+            app.run(host='0.0.0.0', port=5000, debug=False, threaded=True)
     except KeyboardInterrupt:
         print("\n[INFO] Flaskアプリを終了します")
         cleanup_on_exit()
@@ -6,6 +6,7 @@
 """
 
 import cv2
+import functools
 import json
 import os
 import sys
@@ -69,6 +70,22 @@ def find_available_camera():
     print("[ERROR] 利用可能なカメラデバイスが見つかりません")
     return None
 
+def apply_capture_resolution(cap):
+    """setting.jsonのcamera.capture_width/heightでカメラの解像度を設定
+    
+    main.pyとWebアプリも同じ解像度で開くため、ここで決めた座標が判定時と同じ画素を指す
+    """
+    camera_settings = {}
+    try:
+        if os.path.exists('setting.json'):
+            with open('setting.json', 'r', encoding='utf-8') as f:
+                camera_settings = json.load(f).get('camera', {})
+    except Exception as e:
+        print(f"[ERROR] 設定読み込みエラー: {e}")
+    
+    cap.set(cv2.CAP_PROP_FRAME_WIDTH, camera_settings.get('capture_width', 640))
+    cap.set(cv2.CAP_PROP_FRAME_HEIGHT, camera_settings.get('capture_height', 480))
+
 def load_current_settings():
     """現在の設定を読み込み"""
     global coordinates
@@ -115,6 +132,11 @@ def save_coordinates_to_settings():
         print(f"[ERROR] 座標保存エラー: {e}")
         return False
 
+@functools.lru_cache(maxsize=256)
+def get_text_size(text, font_scale, thickness, font=cv2.FONT_HERSHEY_SIMPLEX):
+    """cv2.getTextSizeの結果をキャッシュ（毎フレーム同じ文字列を測り直さない）"""
+    return cv2.getTextSize(text, font, font_scale, thickness)
+
 def draw_coordinate_overlay(frame):
     """座標設定用のオーバーレイを描画"""
     global drawing, start_point, end_point, current_color, coordinates
@@ -172,7 +194,7 @@ def draw_coordinate_overlay(frame):
     y_offset = 30
     for i, instruction in enumerate(instructions):
         # 背景を描画
-        (text_width, text_height), _ = cv2.getTextSize(instruction, cv2.FONT_HERSHEY_SIMPLEX, 0.7, 2)
+        (text_width, text_height), _ = get_text_size(instruction, 0.7, 2)
         cv2.rectangle(overlay_frame, (10, y_offset - text_height - 5), 
                      (text_width + 20, y_offset + 5), (0, 0, 0), -1)
         
@@ -190,7 +212,7 @@ def draw_coordinate_overlay(frame):
     ]
     
     for info in coord_info:
-        (text_width, text_height), _ = cv2.getTextSize(info, cv2.FONT_HERSHEY_SIMPLEX, 0.6, 2)
+        (text_width, text_height), _ = get_text_size(info, 0.6, 2)
         cv2.rectangle(overlay_frame, (10, info_y - text_height - 5), 
                      (text_width + 20, info_y + 5), (50, 50, 50), -1)
         cv2.putText(overlay_frame, info, (15, info_y), 
@@ -228,6 +250,7 @@ def run_coordinate_setter():
     if not cap.isOpened():
         print(f"[ERROR] カメラデバイス {camera_index} を開けませんでした")
         return False
+    apply_capture_resolution(cap)
     
     # ウィンドウを作成
     window_name = "Coordinate Setting Tool"
@@ -315,24 +338,30 @@ def validate_coordinates():
     
     return errors
 
-def preview_coordinates():
-    """設定した座標のプレビューを表示"""
-    global coordinates
+def format_coordinates_preview(coords=None):
+    """座標設定のプレビュー文字列を作成（Webアプリからも直接呼び出す）"""
+    if coords is None:
+        coords = coordinates
     
-    print("\n" + "=" * 40)
-    print("📍 座標設定プレビュー")
-    print("=" * 40)
+    lines = ["", "=" * 40, "📍 座標設定プレビュー", "=" * 40]
     
-    for color, coords in coordinates.items():
-        x1, y1, x2, y2 = coords["x1"], coords["y1"], coords["x2"], coords["y2"]
+    for color in ("orange", "green"):
+        c = coords.get(color, {"x1": 0, "y1": 0, "x2": 0, "y2": 0})
+        x1, y1, x2, y2 = c["x1"], c["y1"], c["x2"], c["y2"]
         width = x2 - x1
         height = y2 - y1
         
         color_indicator = "🟠" if color == "orange" else "🟢"
-        print(f"{color_indicator} {color.upper()}:")
-        print(f"   座標: ({x1}, {y1}) → ({x2}, {y2})")
-        print(f"   サイズ: {width} x {height} ピクセル")
-        print()
+        lines.append(f"{color_indicator} {color.upper()}:")
+        lines.append(f"   座標: ({x1}, {y1}) → ({x2}, {y2})")
+        lines.append(f"   サイズ: {width} x {height} ピクセル")
+        lines.append("")
+    
+    return "\n".join(lines) + "\n"
+
+def preview_coordinates():
+    """設定した座標のプレビューを表示"""
+    print(format_coordinates_preview(), end="")
 
 if __name__ == '__main__':
     # コマンドライン引数で直接実行された場合
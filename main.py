@@ -6,6 +6,7 @@
 """
 
 import cv2
+import functools
 import numpy as np
 import os
 import glob
@@ -15,6 +16,11 @@ import random
 from datetime import datetime, timedelta
 import requests
 import json
+try:
+    from turbojpeg import TurboJPEG, TJPF_BGR, TJSAMP_420  # libjpeg-turbo（未インストールならcv2.imencodeを使用）
+    turbo_jpeg = TurboJPEG()
+except (ImportError, OSError, RuntimeError):
+    turbo_jpeg = None
 from line_notify import notify_group
 
 # グローバル変数でフラグ管理
@@ -170,6 +176,14 @@ def find_available_camera():
     print("[ERROR] 利用可能なカメラデバイスが見つかりません")
     return None
 
+def apply_capture_resolution(cap):
+    """setting.jsonのcamera.capture_width/heightでカメラの解像度を設定
+    
+    Webアプリ（app.py）と座標設定ツールも同じ解像度で開くため、座標が同じ画素を指す
+    """
+    cap.set(cv2.CAP_PROP_FRAME_WIDTH, get_setting('camera.capture_width', 640))
+    cap.set(cv2.CAP_PROP_FRAME_HEIGHT, get_setting('camera.capture_height', 480))
+
 def capture_from_camera():
     """カメラから画像をキャプチャして保存"""
     print("[CAMERA] カメラから画像をキャプチャ中...")
@@ -190,6 +204,7 @@ def capture_from_camera():
     if not cap.isOpened():
         print(f"[ERROR] カメラデバイス {camera_index} を開けませんでした")
         return None
+    apply_capture_resolution(cap)
     
     try:
         # フレームをキャプチャ
@@ -217,6 +232,11 @@ def capture_from_camera():
         cap.release()
         print("カメラを正常に閉じました")
 
+@functools.lru_cache(maxsize=256)
+def get_text_size(text, font_scale, thickness, font=cv2.FONT_HERSHEY_SIMPLEX):
+    """cv2.getTextSizeの結果をキャッシュ（毎フレーム同じ文字列を測り直さない）"""
+    return cv2.getTextSize(text, font, font_scale, thickness)
+
 def draw_text_with_background(image, text, position, font_scale=None, color=(255, 255, 255), bg_color=(0, 0, 0), thickness=None):
     """背景付きでテキストを描画"""
     if font_scale is None:
@@ -226,7 +246,7 @@ def draw_text_with_background(image, text, position, font_scale=None, color=(255
     font = cv2.FONT_HERSHEY_SIMPLEX
     
     # テキストサイズを取得
-    (text_width, text_height), baseline = cv2.getTextSize(text, font, font_scale, thickness)
+    (text_width, text_height), baseline = get_text_size(text, font_scale, thickness)
     
     # 背景矩形を描画
     x, y = position
@@ -285,8 +305,8 @@ def draw_detection_boxes(frame, detection_results=None):
                 font_scale = get_setting('display.detection_label_font_scale', 0.4)
                 label_thickness = get_setting('display.detection_label_thickness', 1)
                 
-                (label_width, label_height), baseline = cv2.getTextSize(
-                    label_text, font, font_scale, label_thickness
+                (label_width, label_height), baseline = get_text_size(
+                    label_text, font_scale, label_thickness
                 )
                 
                 # ラベル位置（枠の上部）
@@ -410,6 +430,16 @@ def create_status_overlay(frame, detection_logs, current_time, detection_results
     
     return overlay_frame
 
+def encode_jpeg(frame, quality=85):
+    """BGRフレームをJPEGバイト列にエンコード（libjpeg-turboがあれば使用）"""
+    if turbo_jpeg is not None:
+        return turbo_jpeg.encode(frame, quality=quality, pixel_format=TJPF_BGR, jpeg_subsample=TJSAMP_420)
+    _, buffer = cv2.imencode('.jpg', frame, [cv2.IMWRITE_JPEG_QUALITY, quality])
+    return buffer.tobytes()
+
+# Web表示用JPEGの画質（監視画面での確認用なので85は過剰、4:2:0サンプリングで十分）
+WEB_JPEG_QUALITY = 70
+
 def save_frame_for_web(frame):
     """Web表示用にフレームを画像ファイルとして保存"""
     try:
@@ -418,18 +448,22 @@ def save_frame_for_web(frame):
         if not os.path.exists(streaming_dir):
             os.makedirs(streaming_dir)
         
+        # JPEGへのエンコードは1回だけ行い、現在のフレームとバックアップの両方に書き込む
+        jpeg = encode_jpeg(frame, quality=WEB_JPEG_QUALITY)
+        
         # 現在のフレームを保存
         current_frame_path = os.path.join(streaming_dir, "current_frame.jpg")
-        success = cv2.imwrite(current_frame_path, frame, [cv2.IMWRITE_JPEG_QUALITY, 85])
+        with open(current_frame_path, 'wb') as f:
+            f.write(jpeg)
         
-        if success:
-            # タイムスタンプ付きでバックアップも保存（最新3枚のみ保持）
-            timestamp = datetime.now().strftime("%Y%m%d_%H%M%S")
-            backup_path = os.path.join(streaming_dir, f"frame_{timestamp}.jpg")
-            cv2.imwrite(backup_path, frame, [cv2.IMWRITE_JPEG_QUALITY, 85])
-            
-            # 古いバックアップファイルを削除（最新3枚のみ保持）
-            cleanup_old_frames(streaming_dir)
+        # タイムスタンプ付きでバックアップも保存（最新3枚のみ保持）
+        timestamp = datetime.now().strftime("%Y%m%d_%H%M%S")
+        backup_path = os.path.join(streaming_dir, f"frame_{timestamp}.jpg")
+        with open(backup_path, 'wb') as f:
+            f.write(jpeg)
+        
+        # 古いバックアップファイルを削除（最新3枚のみ保持）
+        cleanup_old_frames(streaming_dir)
         
     except Exception as e:
         print(f"[ERROR] Web用フレーム保存エラー: {e}")
@@ -468,6 +502,7 @@ def run_camera_with_live_display():
     if not cap.isOpened():
         print(f"[ERROR] カメラデバイス {camera_index} を開けませんでした")
         return False
+    apply_capture_resolution(cap)
     
     # 初期状態をリセット
     current_state = None
@@ -709,42 +744,49 @@ def load_image(image_path):
     
     return image
 
+# 色範囲の設定 (HSV)。呼び出しごとに配列を生成しないようモジュール読み込み時に作成
+DEFAULT_COLOR_RANGES = {
+    'オレンジ': [
+        (np.array([11, 50, 50], dtype=np.uint8), np.array([25, 255, 255], dtype=np.uint8))      # オレンジ色
+    ],
+    '緑': [
+        (np.array([40, 50, 50], dtype=np.uint8), np.array([80, 255, 255], dtype=np.uint8))      # 緑色
+    ]
+}
+
+ENHANCED_COLOR_RANGES = {
+    'オレンジ': [
+        # オレンジ色の範囲を拡張
+        (np.array([8, 30, 30], dtype=np.uint8), np.array([30, 255, 255], dtype=np.uint8))       # オレンジ色（拡張）
+    ],
+    '緑': [
+        # 緑色の範囲を拡張
+        (np.array([35, 30, 30], dtype=np.uint8), np.array([85, 255, 255], dtype=np.uint8))      # 緑色（拡張）
+    ]
+}
+
+STRICT_COLOR_RANGES = {
+    'オレンジ': [
+        # より狭い範囲で明度・彩度の下限を上げる
+        (np.array([12, 80, 80], dtype=np.uint8), np.array([25, 255, 255], dtype=np.uint8))      # オレンジ色（厳格）
+    ],
+    '緑': [
+        # より狭い範囲で明度・彩度の下限を上げる  
+        (np.array([45, 80, 80], dtype=np.uint8), np.array([75, 255, 255], dtype=np.uint8))      # 緑色（厳格）
+    ]
+}
+
 def get_default_color_ranges():
     """デフォルトの色範囲設定を取得"""
-    return {
-        'オレンジ': [
-            (np.array([11, 50, 50]), np.array([25, 255, 255]))      # オレンジ色
-        ],
-        '緑': [
-            (np.array([40, 50, 50]), np.array([80, 255, 255]))      # 緑色
-        ]
-    }
+    return DEFAULT_COLOR_RANGES
 
 def get_enhanced_color_ranges():
     """検出精度を向上させた色範囲設定"""
-    return {
-        'オレンジ': [
-            # オレンジ色の範囲を拡張
-            (np.array([8, 30, 30]), np.array([30, 255, 255]))       # オレンジ色（拡張）
-        ],
-        '緑': [
-            # 緑色の範囲を拡張
-            (np.array([35, 30, 30]), np.array([85, 255, 255]))      # 緑色（拡張）
-        ]
-    }
+    return ENHANCED_COLOR_RANGES
 
 def get_strict_color_ranges():
     """誤検知を減らす厳格な色範囲設定"""
-    return {
-        'オレンジ': [
-            # より狭い範囲で明度・彩度の下限を上げる
-            (np.array([12, 80, 80]), np.array([25, 255, 255]))      # オレンジ色（厳格）
-        ],
-        '緑': [
-            # より狭い範囲で明度・彩度の下限を上げる  
-            (np.array([45, 80, 80]), np.array([75, 255, 255]))      # 緑色（厳格）
-        ]
-    }
+    return STRICT_COLOR_RANGES
 
 def get_adaptive_color_ranges():
     """設定ファイルから動的に色範囲を取得"""